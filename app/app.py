@@ -1,9 +1,9 @@
 import plotly.graph_objects as go
 import pandas as pd
 import dash_bootstrap_components as dbc
-import diskcache
 import os
-from time import sleep
+from functools import partial, lru_cache
+from time import monotonic
 from dash.long_callback import DiskcacheLongCallbackManager
 from dash import Dash, dcc, html, dash_table, Input, Output, State, callback_context
 from dash_auth import BasicAuth
@@ -12,13 +12,18 @@ from random import choice
 from helpers_dash import (
     heading, card_tab,
     html_label, html_label_center,
-    dash_text_wrapper
+    dash_text_wrapper, dash_table_interactive
 )
-from helpers_data import (
-    df_renamer, df_dropper,
-    df_persona_stream_cleaner, df_melt_ratings,
-    df_top_n_skills, df_filter_multiple,
-    df_filter_multiple_simple
+from helpers_dataset import Dataset
+from helpers_filter import FilterSpec
+from helpers_typeahead import TypeaheadIndex, TYPEAHEAD_LIMIT, dropdown_options
+from helpers_api import api_blueprint
+from helpers_cache import (
+    memoize, sync_version, cache_stats, open_caches
+)
+from helpers_metrics import (
+    instrument_server, instrument_job,
+    cache_gauges, job_gauges, shared_totals
 )
 from helpers_plotly import (
     radar_single, radar_comparison,
@@ -26,10 +31,16 @@ from helpers_plotly import (
 )
 from helpers_gpt import (
     generate_prompt_from_data, # for testing purposes only 
-    generate_profile_summary
+    stream_profile_summary,
+    evict_changed_summaries,
+    run_summary_job,
+    completion_client,
+    SharedTokenBucket, GPT_BURST
 )
+from helpers_jobs import JobQueue
 from helpers_nltk import (
     nltk_count_words,
+    stop_words
 )
 
 # app set-up
@@ -37,12 +48,23 @@ USER_PWD = {
     os.getenv('USER') : os.getenv('PASSWORD')
 }
 
-cache = diskcache.Cache("./cache")
+RESULT_TTL = 24 * 60 * 60 # seconds a memoized callback result is kept
+TEAM_TIME_BUDGET = 0.5 # seconds the team builder searches for smaller teams
+TEAM_MAX_NAMES = 5 # interchangeable consultants listed per team member
+SEARCH_PAGE_SIZE = 25 # search results rows per page
+SEARCH_COLUMNS = {'consultant_name' : 'Name', 'skill_rating' : 'Rating', 'technology' : 'Technology'}
+GPT_RATE = float(os.getenv('GPT_RATE', 1)) # summary requests started per second, across all workers
+GPT_WORKERS = int(os.getenv('GPT_WORKERS', 2)) # summary requests in flight per worker process
+SUMMARY_TEXT_INTERVAL = 0.2 # seconds between updates of the streamed summary text
+SUMMARY_CLOUD_INTERVAL = 1.0 # seconds between updates of the streamed word cloud
+
+# coordination state of the workers in cache, memoized results and summaries in the bounded result_cache
+cache, result_cache = open_caches("./cache")
 long_callback_manager = DiskcacheLongCallbackManager(cache)
 dbc_css = "https://cdn.jsdelivr.net/gh/AnnMarieW/dash-bootstrap-templates/dbc.min.css"
 app = Dash(__name__, external_stylesheets=[dbc.themes.LUX, dbc_css], long_callback_manager=long_callback_manager)
 app.title = 'éxpose skills matrix'
-BasicAuth(app, USER_PWD)
+auth = BasicAuth(app, USER_PWD)
 server = app.server
 
 # wrapper to style dcc componenets as dbc
@@ -59,23 +81,99 @@ top_heading = dbc.Container([
     ])
 ], fluid=True)
 
-# load the data
-df = (
-    pd.read_excel('data/Expose_Skills_Matrix_Master_Current.xlsx', sheet_name='Ratings')
-    .pipe(df_renamer)
-    .pipe(df_dropper)
-    .pipe(df_persona_stream_cleaner)
-    .pipe(df_melt_ratings)
+# load the data into a consultant x technology matrix, from its snapshot unless the workbook changed
+# the workers take turns checking the workbook and publish a new version in the cache, see gunicorn.conf.py
+DATA_PATH = 'data/Expose_Skills_Matrix_Master_Current.xlsx'
+DATA_WATCH_INTERVAL = int(os.getenv('DATA_WATCH_INTERVAL', 10)) # seconds between checks of the workbook
+dataset = Dataset(DATA_PATH, cache)
+
+# every request is answered from the published version of the matrix
+@server.before_request
+def follow_dataset():
+    dataset.follow()
+
+# json api for other tools
+server.register_blueprint(api_blueprint(dataset, auth), url_prefix='/api/v1')
+
+# memoized results are shared by all workers and dropped when the workbook changes
+sync_version(result_cache, dataset.matrix.version, state=cache)
+dataset.subscribe(lambda matrix : sync_version(result_cache, matrix.version, state=cache))
+
+# cached profile summaries of consultants whose ratings changed are dropped
+evict_changed_summaries(result_cache, dataset.matrix, state=cache)
+dataset.subscribe(lambda matrix : evict_changed_summaries(result_cache, matrix, state=cache))
+
+# summary requests are paced across workers instead of each waiting a second
+gpt_limiter = SharedTokenBucket(cache, GPT_RATE, capacity=GPT_BURST)
+
+# summaries are generated by a bounded pool of threads in every worker, see gunicorn.conf.py
+# people asking for the same summary while it is generated share the one request
+summary_jobs = JobQueue(
+    cache, partial(run_summary_job, cache=result_cache, limiter=gpt_limiter), name='summary_jobs', workers=GPT_WORKERS
+)
+
+# callback latency and payload size, gpt calls and the shared caches, at /metrics
+# each worker adds its own figures to the shared totals, see gunicorn.conf.py
+instrument_server(
+    app, cache, auth,
+    lambda : cache_gauges(cache_stats(result_cache, shared_totals(cache))) + job_gauges(summary_jobs.stats(), 'summary_jobs')
 )
 
+# openai, nltk and plotly express are imported on first use to keep start-up fast, workers warm them up in a thread
+def warm_up():
+    completion_client()
+    stop_words()
+    import plotly.express
+
+memoize_result = lambda selections : memoize(
+    result_cache, lambda inputs : inputs['matrix'].version, selections=selections, ignore=('matrix',), expire=RESULT_TTL
+)
+
+# search index of the technology or consultant dropdowns, one per matrix and column
+@lru_cache(maxsize=4)
+def options_index(matrix, col):
+    return TypeaheadIndex(matrix.options(col))
+
 # get options for the selectors
-get_selector_options = lambda col : sorted(df[col].unique().tolist())
+# technologies and names are searched on the server, the layout only holds the first of them
+def selector_options(matrix):
+    return {
+        'technologies' : options_index(matrix, 'technology').first(TYPEAHEAD_LIMIT),
+        'names' : matrix.options('consultant_name'),
+        'streams' : matrix.options_streams(),
+        'categories' : matrix.options('platform_area_categories'),
+        'relevance' : matrix.options('relevance'),
+    }
+
+# technology counts for the capabilities tab
+@memoize_result(selections=('streams', 'categories', 'relevance'))
+def capability_counts(matrix, streams, categories, relevance, min_rating, max_rating):
+    spec = FilterSpec(streams=streams, categories=categories, relevance=relevance, min_rating=min_rating, max_rating=max_rating)
+    return matrix.rating_counts(spec)
+
+# top skills of the compared consultants for the profiles tab
+@memoize_result(selections=('streams', 'categories'))
+def comparison_skills(matrix, consultants, streams, categories, top_n):
+    spec = FilterSpec(streams=streams, categories=categories, consultants=consultants)
+    return matrix.top_n_skills(spec, top_n)
+
+# most similar colleagues for the similar tab
+@memoize_result(selections=('streams', 'categories', 'relevance'))
+def similar_consultants(matrix, consultant, streams, categories, relevance, top_k):
+    spec = FilterSpec(streams=streams, categories=categories, relevance=relevance)
+    return matrix.similar_consultants(consultant, top_k, spec)
+
+# smallest teams covering the selected technologies for the search tab
+@memoize_result(selections=('technologies',))
+def search_team(matrix, technologies, min_rating):
+    return matrix.build_team(technologies, min_rating, time_budget=TEAM_TIME_BUDGET)
+
+# one page of the consultants holding the selected technologies for the search tab
+@memoize_result(selections=('technologies',))
+def search_results(matrix, technologies, min_rating, max_rating, sort_by, descending, page, page_size):
+    spec = FilterSpec(technologies=technologies, min_rating=min_rating, max_rating=max_rating)
+    return matrix.search_page(spec, sort_by, descending, page, page_size)
 
-options_technologies = get_selector_options('technology')
-options_names = get_selector_options('consultant_name')
-options_streams = sorted(df['persona_stream'].explode().unique().tolist())
-options_categories = get_selector_options('platform_area_categories')
-options_relevance = get_selector_options('relevance')
 options_gpt_model = [
     {
         'label' : 'gpt-3.5-turbo',
@@ -93,27 +191,35 @@ options_gpt_model_disabled = [
     {'label' : opt['label'], 'value' : opt['value'], 'disabled' : True} for opt in options_gpt_model
 ]
 
+# consultant dropdown starting on a random consultant, the others are searched on the server
+def name_dropdown(names, **kwargs):
+    name = choice(names)
+    return dcc.Dropdown(
+        dropdown_options(names[:TYPEAHEAD_LIMIT], name), name, searchable=True, clearable=False, **kwargs
+    )
+
 # capabilities tab inputs
-capabilities_tab_inputs = style_dbc([
-    dbc.Stack([
-        html_label('Persona Stream'),
-        dcc.Dropdown(options_streams, id='input_persona_stream_capability', placeholder='Select one or many...', multi=True, style={'font-size' : '14px'}),
-        html.Br(),
-        html_label('Platform, Area or Categories'),
-        dcc.Dropdown(options_categories, searchable=True, placeholder='Select one or many...', multi=True, id='input_categories_capability', style={'font-size' : '14px'}),
-        html.Br(),
-        html_label('Relevance'),
-        # dcc.Dropdown(options_relevance, multi=True, id='input_relevance'),
-        dbc.Checklist(options=options_relevance, id='input_relevance', style={'font-size' : '14px'}),
-        html.Br(),
-        html_label_center('< Rating >'),        
-        # dbc.Input(type='number', min=1, max=5, value=1, id='input_min_rating_capability'),
-        dcc.RangeSlider(min=1, max=5, step=1, value=[1, 5], id='input_min_rating_capability'),
-        html.Br(),
-        html_label_center('< Frequent — Rare >'),          
-        dcc.RangeSlider(min=0, step=1, marks=None, id='input_capability_graph_slider')
-    ], gap=1)
-])
+def capabilities_tab_inputs(options):
+    return style_dbc([
+        dbc.Stack([
+            html_label('Persona Stream'),
+            dcc.Dropdown(options['streams'], id='input_persona_stream_capability', placeholder='Select one or many...', multi=True, style={'font-size' : '14px'}),
+            html.Br(),
+            html_label('Platform, Area or Categories'),
+            dcc.Dropdown(options['categories'], searchable=True, placeholder='Select one or many...', multi=True, id='input_categories_capability', style={'font-size' : '14px'}),
+            html.Br(),
+            html_label('Relevance'),
+            # dcc.Dropdown(options['relevance'], multi=True, id='input_relevance'),
+            dbc.Checklist(options=options['relevance'], id='input_relevance', style={'font-size' : '14px'}),
+            html.Br(),
+            html_label_center('< Rating >'),        
+            # dbc.Input(type='number', min=1, max=5, value=1, id='input_min_rating_capability'),
+            dcc.RangeSlider(min=1, max=5, step=1, value=[1, 5], id='input_min_rating_capability'),
+            html.Br(),
+            html_label_center('< Frequent — Rare >'),          
+            dcc.RangeSlider(min=0, step=1, marks=None, id='input_capability_graph_slider')
+        ], gap=1)
+    ])
 
 # capabilities tab graph
 capabilities_tab_graph = dbc.Container([
@@ -133,76 +239,88 @@ capabilities_tab_graph = dbc.Container([
 ], fluid=True, style={'text-align' : 'center'})
 
 # capabilities tab
-capabilities_tab = dbc.Container([
-    dbc.Row([
-        dbc.Col([
-            capabilities_tab_inputs
-        ], width=3),
-        dbc.Col([
-            capabilities_tab_graph,
-        ], width=9)
-    ])
-], fluid=True)
+def capabilities_tab(options):
+    return dbc.Container([
+        dbc.Row([
+            dbc.Col([
+                capabilities_tab_inputs(options)
+            ], width=3),
+            dbc.Col([
+                capabilities_tab_graph,
+            ], width=9)
+        ])
+    ], fluid=True)
 
 # search tab inputs
-search_tab_inputs = style_dbc([
-    dbc.Stack([
-        html_label('Technology'),
-        dcc.Dropdown(options_technologies, searchable=True, clearable=True, placeholder='Select one or many...', multi=True, id='input_technology', style={'font-size' : '12px'}),
-        html.Br(),
-        html_label_center('< Rating >'),
-        dcc.RangeSlider(min=1, max=5, step=1, value=[1, 5], id='input_min_rating_search')
-    ], gap=1)
-])
+def search_tab_inputs(options):
+    return style_dbc([
+        dbc.Stack([
+            html_label('Technology'),
+            dcc.Dropdown(options['technologies'], searchable=True, clearable=True, placeholder='Select one or many...', multi=True, id='input_technology', style={'font-size' : '12px'}),
+            html.Br(),
+            html_label_center('< Rating >'),
+            dcc.RangeSlider(min=1, max=5, step=1, value=[1, 5], id='input_min_rating_search'),
+            html.Br(),
+            dbc.Switch(label='Team builder', value=False, id='input_team_builder', style={'font-size' : '14px'})
+        ], gap=1)
+    ])
 
 # search tab table
 search_tab_table = style_dbc([
     html.Div([html_label('Consultants')], style={'text-align' : 'center'}),
     html.Br(),
-    html.Div([], id='search_table')
+    dash_table_interactive('search_table', list(SEARCH_COLUMNS.values()), page_size=SEARCH_PAGE_SIZE)
 ])
 
 # search tab table counts
 search_tab_table_counts = style_dbc([
     html.Div([html_label('Summary')], style={'text-align' : 'center'}),
     html.Br(),
-    html.Div([], id='search_table_counts')
+    html.Div([], id='search_table_counts'),
+    html.Div([
+        html.Br(),
+        html.Div([html_label('Smallest Team')], style={'text-align' : 'center'}),
+        html.Br(),
+        html.Div([], id='search_team')
+    ], style={'display' : 'none'}, id='search_team_hide')
 ])
 
 # search tab
-search_tab = dbc.Container([
-    dbc.Row([
-        dbc.Col([
-            search_tab_inputs
-        ], width=3),
-        dbc.Col([
-            search_tab_table
-        ], width=6),
-        dbc.Col([
-            search_tab_table_counts
-        ], width=3)
-    ])
-], fluid=True)
+def search_tab(options):
+    return dbc.Container([
+        dbc.Row([
+            dbc.Col([
+                search_tab_inputs(options)
+            ], width=3),
+            dbc.Col([
+                search_tab_table
+            ], width=6),
+            dbc.Col([
+                search_tab_table_counts
+            ], width=3)
+        ])
+    ], fluid=True)
 
 # comparison tab inputs
-comparison_tab_inputs = style_dbc([
-    dbc.Stack([
-        html_label('Profile 1'),
-        dcc.Dropdown(options_names, choice(options_names), searchable=True, clearable=False, id='input_consultant_1', style={'font-size' : '14px'}),
-        html.Br(),
-        html_label('Profile 2'),
-        dcc.Dropdown(options_names, choice(options_names), searchable=True, clearable=False, id='input_consultant_2', style={'font-size' : '14px'}),
-        html.Br(),
-        html_label('Persona Stream'),
-        dcc.Dropdown(options_streams, id='input_persona_stream', placeholder='Select one or many...', multi=True, style={'font-size' : '14px'}),
-        html.Br(),
-        html_label('Platform, Area or Categories'),
-        dcc.Dropdown(options_categories, searchable=True, multi=True, placeholder='Select one or many...', id='input_categories', style={'font-size' : '14px'}),
-        html.Br(),
-        html_label_center('Show Ratings'),
-        dcc.Slider(min=5, max=10, step=1, value=7, id='input_n_ratings')
-    ], gap=1)    
-])
+def comparison_tab_inputs(options):
+    return style_dbc([
+        dbc.Stack([
+            html_label('Profile 1'),
+            name_dropdown(options['names'], id='input_consultant_1', style={'font-size' : '14px'}),
+            html.Br(),
+            html_label('Profile 2'),
+            name_dropdown(options['names'], id='input_consultant_2', style={'font-size' : '14px'}),
+            html.Br(),
+            html_label('Persona Stream'),
+            dcc.Dropdown(options['streams'], id='input_persona_stream', placeholder='Select one or many...', multi=True, style={'font-size' : '14px'}),
+            html.Br(),
+            html_label('Platform, Area or Categories'),
+            dcc.Dropdown(options['categories'], searchable=True, multi=True, placeholder='Select one or many...', id='input_categories', style={'font-size' : '14px'}),
+            html.Br(),
+            html_label_center('Show Ratings'),
+            dcc.Slider(min=5, max=10, step=1, value=7, id='input_n_ratings')
+        ], gap=1)    
+    ])
 
 # comparison tab graph
 comparison_tab_graph = dbc.Container([
@@ -222,34 +340,78 @@ comparison_tab_graph = dbc.Container([
 ], fluid=True, style={'text-align' : 'center'})
 
 # comparison tab
-comparison_tab = dbc.Container([
-    dbc.Row([
-        dbc.Col([
-            comparison_tab_inputs
-        ], width=3),
-        dbc.Col([
-            comparison_tab_graph
-        ], width=9),
-        # html.H2(id='tester')
+def comparison_tab(options):
+    return dbc.Container([
+        dbc.Row([
+            dbc.Col([
+                comparison_tab_inputs(options)
+            ], width=3),
+            dbc.Col([
+                comparison_tab_graph
+            ], width=9),
+            # html.H2(id='tester')
+        ])
+    ], fluid=True)
+
+# similar tab inputs
+def similar_tab_inputs(options):
+    return style_dbc([
+        dbc.Stack([
+            html_label('Profile'),
+            name_dropdown(options['names'], id='input_consultant_similar', style={'font-size' : '14px'}),
+            html.Br(),
+            html_label('Persona Stream'),
+            dcc.Dropdown(options['streams'], id='input_persona_stream_similar', placeholder='Select one or many...', multi=True, style={'font-size' : '14px'}),
+            html.Br(),
+            html_label('Platform, Area or Categories'),
+            dcc.Dropdown(options['categories'], searchable=True, multi=True, placeholder='Select one or many...', id='input_categories_similar', style={'font-size' : '14px'}),
+            html.Br(),
+            html_label('Relevance'),
+            dbc.Checklist(options=options['relevance'], id='input_relevance_similar', style={'font-size' : '14px'}),
+            html.Br(),
+            html_label_center('Show Consultants'),
+            dcc.Slider(min=5, max=20, step=5, value=10, id='input_n_similar')
+        ], gap=1)
     ])
-], fluid=True)
 
-# profile ai summary
-profile_ai_summary_tab_inputs = style_dbc([
-    dbc.Stack([
-        html_label('Profile'),
-        dcc.Dropdown(options_names, choice(options_names), searchable=True, clearable=False, id='input_profile_ai', style={'font-size' : '14px'}),
-        html.Br(),
-        html_label_center('Verbosity'),
-        dcc.Slider(min=100, max=500, step=100, value=200, id='input_summary_words'),
-        html.Br(),
-        html_label_center('GPT Model'),
-        dbc.RadioItems(options=options_gpt_model, value=options_gpt_model[0]['value'], inline=True, id='input_gpt_model', style={'font-size' : '14px'}),
-        html.Br(),
-        dbc.Button("Generate profile", color="light", id='generate_summary'),
-    ], gap=1)    
+# similar tab table
+similar_tab_table = style_dbc([
+    html.Div([html_label('Similar Consultants')], style={'text-align' : 'center'}),
+    html.Br(),
+    html.Div([], id='similar_table')
 ])
 
+# similar tab
+def similar_tab(options):
+    return dbc.Container([
+        dbc.Row([
+            dbc.Col([
+                similar_tab_inputs(options)
+            ], width=3),
+            dbc.Col([
+                similar_tab_table
+            ], width=9)
+        ])
+    ], fluid=True)
+
+# profile ai summary
+def profile_ai_summary_tab_inputs(options):
+    return style_dbc([
+        dbc.Stack([
+            html_label('Profile'),
+            name_dropdown(options['names'], id='input_profile_ai', style={'font-size' : '14px'}),
+            html.Br(),
+            html_label_center('Verbosity'),
+            dcc.Slider(min=100, max=500, step=100, value=200, id='input_summary_words'),
+            html.Br(),
+            html_label_center('GPT Model'),
+            dbc.RadioItems(options=options_gpt_model, value=options_gpt_model[0]['value'], inline=True, id='input_gpt_model', style={'font-size' : '14px'}),
+            html.Br(),
+            dbc.Button("Generate profile", color="light", id='generate_summary'),
+            dbc.Button("Cancel", color="light", outline=True, id='cancel_summary', style={'display' : 'none'}),
+        ], gap=1)    
+    ])
+
 # profile ai summary word cloud graph
 profile_ai_summary_tab_wc_graph = html.Div([
     dcc.Graph(
@@ -276,29 +438,60 @@ profile_ai_summary_tab_text = style_dbc([
 ])
 
 # profile ai summary tab
-profile_ai_summary_tab = dbc.Container([
-    dbc.Row([
-        dbc.Col([
-            profile_ai_summary_tab_inputs
-        ], width=3),
-        dbc.Col([
-            profile_ai_summary_tab_text
-        ], width=9),
-    ])
-], fluid=True)
-
-# application layout
-app.layout = dbc.Container([
-    top_heading,
-    dbc.Tabs(
-        [
-            card_tab(label='Capabilities', content=capabilities_tab, id='tab_capabilities'),
-            card_tab(label='Profiles', content=comparison_tab, id='tab_comparison'),
-            card_tab(label='Profile Summary', content=profile_ai_summary_tab, id='tab_profile_ai_summary'),
-            card_tab(label='Search', content=search_tab, id='tab_search'),
-            # card_tab(label='testing', content=testing_tab, id='tab_test'),            
+def profile_ai_summary_tab(options):
+    return dbc.Container([
+        dbc.Row([
+            dbc.Col([
+                profile_ai_summary_tab_inputs(options)
+            ], width=3),
+            dbc.Col([
+                profile_ai_summary_tab_text
+            ], width=9),
         ])
-], fluid=True)
+    ], fluid=True)
+
+# application layout, built on every page load so the selectors follow the current dataset
+def serve_layout():
+    options = selector_options(dataset.matrix)
+    return dbc.Container([
+        top_heading,
+        dbc.Tabs(
+            [
+                card_tab(label='Capabilities', content=capabilities_tab(options), id='tab_capabilities'),
+                card_tab(label='Profiles', content=comparison_tab(options), id='tab_comparison'),
+                card_tab(label='Similar', content=similar_tab(options), id='tab_similar'),
+                card_tab(label='Profile Summary', content=profile_ai_summary_tab(options), id='tab_profile_ai_summary'),
+                card_tab(label='Search', content=search_tab(options), id='tab_search'),
+                # card_tab(label='testing', content=testing_tab, id='tab_test'),            
+            ])
+    ], fluid=True)
+
+app.layout = serve_layout
+
+# dropdowns searched on the server and the matrix column they search
+TYPEAHEAD_DROPDOWNS = {
+    'input_technology' : 'technology',
+    'input_consultant_1' : 'consultant_name',
+    'input_consultant_2' : 'consultant_name',
+    'input_consultant_similar' : 'consultant_name',
+    'input_profile_ai' : 'consultant_name',
+}
+
+# top matches of what is typed in a dropdown, the selected values are kept in the options
+def typeahead_callback(dropdown_id, col):
+    def search_options(search_value, value):
+        index = options_index(dataset.matrix, col)
+        return dropdown_options(index.search(search_value or ''), value, search_value)
+    search_options.__name__ = f'search_options_{dropdown_id}'
+    return app.callback(
+        Output(dropdown_id, 'options'),
+        Input(dropdown_id, 'search_value'),
+        State(dropdown_id, 'value'),
+        prevent_initial_call=True
+    )(search_options)
+
+for dropdown_id, col in TYPEAHEAD_DROPDOWNS.items():
+    typeahead_callback(dropdown_id, col)
 
 # capability graph rangslider min and max values
 @app.callback(
@@ -315,15 +508,13 @@ def update_slider_max(
 ):
     min_rating = input_min_rating_capability_value[0]
     max_rating = input_min_rating_capability_value[1]
-    df_out = (
-        df
-        .pipe(df_filter_multiple, input_persona_stream_capability_value, 'persona_stream') # filter by persona stream
-        .pipe(df_filter_multiple_simple, input_categories_capability_value, 'platform_area_categories') # filter by platform area categories
-        .pipe(df_filter_multiple_simple, input_relevance_value, 'relevance') # filter by relevance
-        .query('skill_rating >= @min_rating') # filter by min rating
-        .query('skill_rating <= @max_rating') # filter by max rating
-        .groupby(['technology'])['id'].count().reset_index()
-        )
+    df_out = capability_counts(
+        dataset.matrix,
+        input_persona_stream_capability_value, # filter by persona stream
+        input_categories_capability_value, # filter by platform area categories
+        input_relevance_value, # filter by relevance
+        min_rating, max_rating # filter by rating
+    )
     return df_out.shape[0], [0, min(df_out.shape[0], 15)]
 
 # capabilities graph
@@ -345,39 +536,34 @@ def update_capability_graph(
     min_rating = input_min_rating_capability_value[0]
     max_rating = input_min_rating_capability_value[1]
     df_out = (
-        df
-        .pipe(df_filter_multiple, input_persona_stream_capability_value, 'persona_stream') # filter by persona stream
-        .pipe(df_filter_multiple_simple, input_categories_capability_value, 'platform_area_categories') # filter by platform area categories
-        .pipe(df_filter_multiple_simple, input_relevance_value, 'relevance') # filter by relevance
-        .query('skill_rating >= @min_rating') # filter by min rating
-        .query('skill_rating <= @max_rating') # filter by max rating
-        .groupby(['technology'])['id'].count().reset_index()
-        .rename(columns={'id' : 'rating_counts'})
+        capability_counts(
+            dataset.matrix,
+            input_persona_stream_capability_value, # filter by persona stream
+            input_categories_capability_value, # filter by platform area categories
+            input_relevance_value, # filter by relevance
+            min_rating, max_rating # filter by rating
+        )
         .sort_values(by='rating_counts', ascending=False)
         .iloc[input_capability_graph_slider_value[0]:input_capability_graph_slider_value[1]]
         )
     
     # adapt the scale according to counts
     scale, fill_color = [0, 10], '#e6cce6' # light purple
+    max_counts = df_out['rating_counts'].max() if df_out.shape[0] > 0 else 0
+    if max_counts > 10:
+        scale, fill_color = [0, 25], '#c080c0' # darker purple
+    if max_counts > 25:
+        scale, fill_color = [0, 55], '#800080' # same as COLOR_1
 
     # render graph
     fig = radar_single(df_out, 'rating_counts', 'technology', range_r=scale, fill_color=fill_color)
 
-    # if nothing found, then don't show and return here
+    # if nothing found, then don't show
     if any([
         df_out.shape[0] == 0,
     ]):
         return fig, {'display' : 'none'}, {'display' : 'block'}
 
-    max_counts = df_out['rating_counts'].max()
-    if max_counts > 10:
-        scale, fill_color = [0, 25], '#c080c0' # darker purple
-    if max_counts > 25:
-        scale, fill_color = [0, 55], '#800080' # same as COLOR_1
-    
-    # re-draw the graph
-    fig = radar_single(df_out, 'rating_counts', 'technology', range_r=scale, fill_color=fill_color)
-
     return fig, {'display' : 'block'}, {'display' : 'none'}
 
 # comparison graph
@@ -398,10 +584,13 @@ def update_graph(
     input_n_ratings_value
     ):
     df_out = (
-        df
-        .pipe(df_filter_multiple, input_persona_stream_value, 'persona_stream') # filter by persona stream
-        .pipe(df_filter_multiple_simple, input_categories_value, 'platform_area_categories') # filter by platform area categories
-        .pipe(df_top_n_skills, [input_consultant_1_value, input_consultant_2_value], input_n_ratings_value) # filter by consultants
+        comparison_skills(
+            dataset.matrix,
+            [input_consultant_1_value, input_consultant_2_value], # filter by consultants
+            input_persona_stream_value, # filter by persona stream
+            input_categories_value, # filter by platform area categories
+            input_n_ratings_value
+        )
         [['skill_rating', 'technology', 'consultant_name']]
     )
 
@@ -417,14 +606,50 @@ def update_graph(
 
     return fig, {'display' : 'block'}, {'display' : 'none'}
     
+# similar consultants table
 @app.callback(
-    Output('search_table', 'children'),
+    Output('similar_table', 'children'),
+    Input('input_consultant_similar', 'value'),
+    Input('input_persona_stream_similar', 'value'),
+    Input('input_categories_similar', 'value'),
+    Input('input_relevance_similar', 'value'),
+    Input('input_n_similar', 'value'),
+)
+def update_similar_table(
+    input_consultant_similar_value, input_persona_stream_similar_value,
+    input_categories_similar_value, input_relevance_similar_value,
+    input_n_similar_value
+):
+    df_out = similar_consultants(
+        dataset.matrix,
+        input_consultant_similar_value,
+        input_persona_stream_similar_value, # filter by persona stream
+        input_categories_similar_value, # filter by platform area categories
+        input_relevance_similar_value, # filter by relevance
+        input_n_similar_value
+    )
+    df_out = (
+        df_out
+        .assign(similarity=(df_out['similarity'] * 100).round(decimals=0).astype('int64').astype(str) + '%')
+        .rename(columns={'consultant_name' : 'Name', 'similarity' : 'Similarity'})
+    )
+    return dbc.Table.from_dataframe(df_out, striped=True, bordered=True, size='sm')
+
+# search results table, the page shown is sent and new selections go back to the first page
+@app.callback(
+    Output('search_table', 'data'),
+    Output('search_table', 'page_count'),
+    Output('search_table', 'page_current'),
     Output('search_table_counts', 'children'),
     Input('input_technology', 'value'),
     Input('input_min_rating_search', 'value'),
+    Input('search_table', 'page_current'),
+    Input('search_table', 'page_size'),
+    Input('search_table', 'sort_by'),
 )
 def update_table(
-    input_technology_value, input_min_rating_search_value
+    input_technology_value, input_min_rating_search_value,
+    page_current=0, page_size=SEARCH_PAGE_SIZE, sort_by=None
 ):
     min_rating, max_rating = input_min_rating_search_value[0], input_min_rating_search_value[1]
 
@@ -432,28 +657,71 @@ def update_table(
     if input_technology_value is None:
         input_technology_value = []
 
-    df_out = (
-        df
-        .pipe(df_filter_multiple_simple, input_technology_value, 'technology')
-        .query('skill_rating >= @min_rating')
-        .query('skill_rating <= @max_rating')
-        .sort_values(by=['technology', 'skill_rating', 'consultant_name'], ascending=[True, False, True])
-        [['consultant_name', 'skill_rating', 'technology']]
-        .rename(columns={'consultant_name' : 'Name', 'skill_rating' : 'Rating', 'technology' : 'Technology'})
+    # paging keeps the page, anything else starts over
+    triggered = [t['prop_id'] for t in callback_context.triggered] if callback_context.triggered else []
+    if 'search_table.page_current' not in triggered:
+        page_current = 0
+
+    # sort by the column clicked last
+    column_names = {name : col for col, name in SEARCH_COLUMNS.items()}
+    sort_col, descending = None, False
+    if sort_by:
+        sort_col, descending = column_names[sort_by[0]['column_id']], sort_by[0]['direction'] == 'desc'
+
+    df_out, n_rows, n_consultants = search_results(
+        dataset.matrix, input_technology_value, min_rating, max_rating,
+        sort_col, descending, page_current or 0, page_size
     )
+    df_out = df_out.rename(columns=SEARCH_COLUMNS)
 
     # group by rating
     df_out_counts = pd.DataFrame({
         'Rating' : [f'between {min_rating} and {max_rating}'],
-        'Consultants' : [df_out['Name'].nunique()],
+        'Consultants' : [n_consultants],
         # 'Technologies' : [''.join(input_technology_value)]
         })
-    # return dash_table_interactive(df_out), dash_table_simple(df_out_counts)
     return\
-        dbc.Table.from_dataframe(df_out, striped=True, bordered=True, size='sm'),\
+        df_out.to_dict('records'), max(-(-n_rows // page_size), 1), page_current or 0,\
         dbc.Table.from_dataframe(df_out_counts, bordered=True, size='sm')
 
 
+# smallest team covering the searched technologies
+@app.callback(
+    Output('search_team', 'children'),
+    Output('search_team_hide', 'style'),
+    Input('input_team_builder', 'value'),
+    Input('input_technology', 'value'),
+    Input('input_min_rating_search', 'value'),
+)
+def update_team(
+    input_team_builder_value, input_technology_value, input_min_rating_search_value
+):
+    # team builder is off or nothing to cover
+    if not input_team_builder_value or not input_technology_value:
+        return [], {'display' : 'none'}
+
+    df_team, uncovered, optimal = search_team(dataset.matrix, input_technology_value, input_min_rating_search_value[0])
+
+    # interchangeable consultants are listed together
+    join_names = lambda x : ' / '.join(x[:TEAM_MAX_NAMES]) + (f' +{len(x) - TEAM_MAX_NAMES}' if len(x) > TEAM_MAX_NAMES else '')
+    df_out = (
+        df_team
+        .assign(
+            consultants=df_team['consultants'].apply(join_names),
+            technologies=df_team['technologies'].apply(', '.join)
+        )
+        .rename(columns={'team' : 'Team', 'consultants' : 'Consultants', 'technologies' : 'Covers'})
+    )
+    notes = []
+    if not optimal:
+        notes.append(html.P('Best teams found within the time limit, a smaller team may exist.'))
+    if len(uncovered) > 0:
+        notes.append(html.P(f'No one is rated {input_min_rating_search_value[0]} or above in: {", ".join(uncovered)}'))
+    return \
+        [dbc.Table.from_dataframe(df_out, bordered=True, size='sm')] + notes,\
+        {'display' : 'block'}
+
+
 # profile ai summary callback
 @app.long_callback(
     output=[
@@ -471,29 +739,54 @@ def update_table(
         State('input_summary_words', 'value'),
         State('input_gpt_model', 'value'),
     ],
+    progress=[
+        Output('gpt_response', 'children'),
+        Output('word_cloud_graph', 'figure'),
+    ],
+    interval=250,
+    cancel=[Input('cancel_summary', 'n_clicks')],
     running=[
         (Output('generate_summary', 'disabled'), True, False),
         (Output('input_profile_ai', 'disabled'), True, False),    
         (Output('input_summary_words', 'disabled'), True, False),
         (Output('input_gpt_model', 'options'), options_gpt_model_disabled, options_gpt_model),
-        (Output('gpt_response', 'style'), {'display' : 'none'}, {'display' : 'block'}),
+        (Output('gpt_response', 'style'), {'display' : 'block'}, {'display' : 'block'}),
         (Output('summary_heading_hide', 'children'), html_label(f'Generating profile summary...'), ''),
         (Output('summary_heading_hide', 'style'), {'display' : 'block', 'text-align' : 'center'}, {'display' : 'block', 'text-align' : 'center'}),
         (Output('summary_gpt_heading_hide', 'style'), {'display' : 'none', 'text-align' : 'center'}, {'display' : 'block', 'text-align' : 'center'}),        
         (Output('summary_progress_bar', 'style'), {'display' : 'block'}, {'display' : 'none'}),
-        (Output('word_cloud_graph_show', 'style'), {'display' : 'none'}, {'display' : 'block'}),        
+        (Output('cancel_summary', 'style'), {'display' : 'block'}, {'display' : 'none'}),
+        (Output('word_cloud_graph_show', 'style'), {'display' : 'block'}, {'display' : 'block'}),        
     ],
     prevent_initial_call=True
 )
-def get_ai_summary(n_clicks, input_profile_ai_value, input_summary_words_value, input_gpt_model_value):
+@instrument_job(cache)
+def get_ai_summary(set_progress, n_clicks, input_profile_ai_value, input_summary_words_value, input_gpt_model_value):
     summary_heading_style = {'display' : 'block', 'text-align' : 'center'}
-    sleep(1) # wait 1 second to prevent too many calls
-    response = generate_profile_summary(df, input_profile_ai_value, input_summary_words_value, input_gpt_model_value)
-    # response = generate_prompt_from_data(df, input_profile_ai_value, input_summary_words_value)
+    n_freq = min(int(input_summary_words_value/20), 30)
+    summary_word_counts = lambda text : nltk_count_words(text, input_profile_ai_value, text_magnify=120, n_freq=n_freq)
+
+    # the text is pushed as it streams in, the word cloud less often as it is slower to compute
+    response, fig_word_cloud = '', go.Figure()
+    text_pushed = cloud_pushed = 0.0
+    for response in stream_profile_summary(
+        dataset.matrix, input_profile_ai_value, input_summary_words_value, input_gpt_model_value,
+        cache=result_cache, jobs=summary_jobs
+    ):
+        now = monotonic()
+        if now - text_pushed < SUMMARY_TEXT_INTERVAL:
+            continue
+        if now - cloud_pushed >= SUMMARY_CLOUD_INTERVAL:
+            df_word_cloud = summary_word_counts(response)
+            if df_word_cloud.shape[0] >= 3: # the word cloud needs a few words to lay out
+                fig_word_cloud = word_cloud(df_word_cloud)
+                cloud_pushed = now
+        set_progress((dash_text_wrapper(response), fig_word_cloud))
+        text_pushed = monotonic()
+    # response = generate_prompt_from_data(dataset.matrix, input_profile_ai_value, input_summary_words_value)
 
     # compute word frequencies
-    df_word_cloud = nltk_count_words(response, input_profile_ai_value, text_magnify=120, n_freq=min(int(input_summary_words_value/20), 30))
-    fig_word_cloud = word_cloud(df_word_cloud)
+    fig_word_cloud = word_cloud(summary_word_counts(response))
 
     return \
         dash_text_wrapper(response), summary_heading_style, html_label(f'{input_profile_ai_value}'),\
@@ -503,4 +796,8 @@ def get_ai_summary(n_clicks, input_profile_ai_value, input_summary_words_value,
 
 # uncomment below for development and debugging
 # if __name__ == '__main__':
+#     dataset.watch(DATA_WATCH_INTERVAL)
+#     summary_jobs.start()
+#     from helpers_metrics import metrics
+#     metrics.start(cache)
 #     app.run_server(port='8051', host='0.0.0.0', debug=True)
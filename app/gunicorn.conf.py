@@ -0,0 +1,24 @@
+import gc
+import os
+import threading
+
+# gunicorn settings, command line arguments take precedence
+bind = os.getenv('BIND', '0.0.0.0:80')
+workers = int(os.getenv('WORKERS', 4))
+
+# load app.py and the skills matrix once in the master, workers share them after the fork
+preload_app = True
+
+# keep the garbage collector from touching the preloaded objects, which would copy their pages into every worker
+def when_ready(server):
+    gc.freeze()
+
+# watch the workbook, run summary jobs and flush metrics from every worker, threads do not survive the fork so they start here
+# app.warm_up runs alongside, while the worker already serves
+def post_fork(server, worker):
+    import app
+    from helpers_metrics import metrics
+    app.dataset.watch(app.DATA_WATCH_INTERVAL)
+    app.summary_jobs.start()
+    metrics.start(app.cache)
+    threading.Thread(target=app.warm_up, name='warm-up', daemon=True).start()
@@ -0,0 +1,125 @@
+import gzip
+import json
+from flask import Blueprint, Response, g, request
+from helpers_filter import FilterSpec
+
+# responses smaller than this are not worth compressing
+GZIP_MIN_SIZE = 500
+GZIP_LEVEL = 6
+
+# error body of a bad request
+class ApiError(Exception):
+
+    def __init__(self, message: str, status=400):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+# a multi selection from repeated query parameters, nothing selected is None like in the app
+def arg_list(name: str):
+    values = request.args.getlist(name)
+    return values if len(values) > 0 else None
+
+def arg_int(name: str, default: int, low: int, high: int):
+    value = request.args.get(name, default)
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        raise ApiError(f'{name} must be a whole number')
+    if not low <= value <= high:
+        raise ApiError(f'{name} must be between {low} and {high}')
+    return value
+
+# read-only json api over the current skills matrix, behind the same auth as the app
+# responses carry an etag of the dataset version, so polling clients get a 304 until the workbook changes
+# the etag is only compared once a request succeeded, bad requests and unknown names still get their error
+def api_blueprint(dataset, auth):
+    api = Blueprint('api', __name__)
+
+    # the matrix a request is answered from, its version tags the response whatever the dataset holds by then
+    def current_matrix():
+        matrix = dataset.matrix
+        g.api_version = matrix.version
+        return matrix
+
+    @api.before_request
+    def authorize():
+        if not auth.is_authorized():
+            return auth.login_request()
+
+    @api.errorhandler(ApiError)
+    def api_error(e):
+        return Response(json.dumps({'error' : e.message}), status=e.status, mimetype='application/json')
+
+    # tag the json responses and compress them, unless the client already has them
+    @api.after_request
+    def finish(response):
+        if response.status_code != 200 or response.mimetype != 'application/json' or 'api_version' not in g:
+            return response
+        response.set_etag(g.api_version, weak=True)
+        response.headers['Cache-Control'] = 'no-cache'
+        response.vary.add('Accept-Encoding')
+        response.make_conditional(request)
+        if response.status_code == 200 and 'gzip' in request.accept_encodings and response.content_length >= GZIP_MIN_SIZE:
+            response.set_data(gzip.compress(response.get_data(), GZIP_LEVEL))
+            response.headers['Content-Encoding'] = 'gzip'
+        return response
+
+    def records(df, **fields):
+        df = df.astype(object).where(df.notna(), None)
+        payload = dict(version=g.api_version, **fields, count=len(df), results=df.to_dict('records'))
+        return Response(json.dumps(payload), mimetype='application/json')
+
+    @api.route('/version')
+    def version():
+        return Response(json.dumps({'version' : current_matrix().version}), mimetype='application/json')
+
+    # consultants rated within a range in any of the technologies, like the search tab
+    #   /api/v1/consultants?technology=Python&technology=DAX&min_rating=4
+    @api.route('/consultants')
+    def consultants():
+        matrix = current_matrix()
+        technologies = arg_list('technology')
+        min_rating = arg_int('min_rating', 1, 0, 5)
+        max_rating = arg_int('max_rating', 5, min_rating, 5)
+        df = matrix.search(FilterSpec(technologies=technologies or [], min_rating=min_rating, max_rating=max_rating))
+        return records(df, technologies=technologies, min_rating=min_rating, max_rating=max_rating)
+
+    # consultants per technology rated within a range, like the capabilities tab
+    #   /api/v1/capabilities?stream=Engineering&relevance=Focus&min_rating=3
+    @api.route('/capabilities')
+    def capabilities():
+        matrix = current_matrix()
+        streams, categories, relevance = arg_list('stream'), arg_list('category'), arg_list('relevance')
+        min_rating = arg_int('min_rating', 1, 0, 5)
+        max_rating = arg_int('max_rating', 5, min_rating, 5)
+        spec = FilterSpec(
+            streams=streams, categories=categories, relevance=relevance, min_rating=min_rating, max_rating=max_rating
+        )
+        df = (
+            matrix.rating_counts(spec)
+            .sort_values(by=['rating_counts', 'technology'], ascending=[False, True])
+        )
+        return records(
+            df, streams=streams, categories=categories, relevance=relevance,
+            min_rating=min_rating, max_rating=max_rating
+        )
+
+    # a consultant's top rated technologies, like the profiles tab
+    #   /api/v1/consultants/Adam/skills?top_n=10
+    @api.route('/consultants/<name>/skills')
+    def skills(name: str):
+        matrix = current_matrix()
+        if name not in matrix.consultant_index:
+            raise ApiError(f'no consultant named {name}', status=404)
+        streams, categories = arg_list('stream'), arg_list('category')
+        top_n = arg_int('top_n', 10, 1, matrix.shape[1])
+        df = (
+            matrix.top_n_skills(FilterSpec(streams=streams, categories=categories, consultants=[name]), top_n)
+            .dropna(subset=['skill_rating'])
+            .sort_values(by=['skill_rating', 'technology'], ascending=[False, True])
+            [['technology', 'skill_rating', 'platform_area_categories', 'relevance']]
+        )
+        return records(df, consultant=name, streams=streams, categories=categories, top_n=top_n)
+
+    return api
@@ -0,0 +1,98 @@
+import hashlib
+import json
+import os
+from functools import wraps
+from inspect import signature
+import diskcache
+from helpers_metrics import metrics
+
+# tag shared by all memoized callback results
+CALLBACK_TAG = 'callback'
+
+RESULTS_DIR = 'results' # memoized results and summaries, inside the cache directory
+RESULTS_SIZE_LIMIT = int(os.getenv('CACHE_SIZE_LIMIT', 2**28)) # bytes, least recently stored entries are evicted first
+
+# returned by cache.get when the key is missing
+_MISSING = object()
+
+# hash the content of a file, used as the dataset version
+def file_digest(path: str, length=16):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda : f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()[:length]
+
+# the caches shared by the workers, the coordination state and the results beside it
+# coordination state such as queues, leases, versions and counters is never evicted, results that can be
+# computed again are kept in a bounded cache
+def open_caches(directory: str, size_limit=RESULTS_SIZE_LIMIT):
+    cache = diskcache.Cache(directory, eviction_policy='none')
+    results = diskcache.Cache(os.path.join(directory, RESULTS_DIR), size_limit=size_limit)
+    return cache, results
+
+# nothing selected is None or [], and the order of a multi selection does not matter
+def normalize_inputs(inputs: dict, selections=()):
+    out = {}
+    for name, value in inputs.items():
+        if name in selections:
+            value = sorted(set(value)) if isinstance(value, (list, tuple)) and len(value) > 0 else None
+        elif isinstance(value, tuple):
+            value = list(value)
+        out[name] = value
+    return out
+
+# cache key for a function call
+def cache_key(name: str, version: str, inputs: dict):
+    payload = json.dumps(inputs, sort_keys=True, default=str)
+    return '{}:{}:{}'.format(name, version, hashlib.sha1(payload.encode()).hexdigest())
+
+# memoize a function in the shared diskcache, keyed on normalized inputs and the dataset version
+# version gets the bound arguments, arguments in ignore are left out of the key
+# hits and misses are counted by the metrics of each process, a cached read does not write to the cache
+def memoize(cache, version, selections=(), ignore=(), expire=None, tag=CALLBACK_TAG):
+    def decorator(f):
+        sig = signature(f)
+
+        @wraps(f)
+        def wrap(*args, **kwargs):
+            bound = sig.bind(*args, **kwargs)
+            bound.apply_defaults()
+            inputs = {name : value for name, value in bound.arguments.items() if name not in ignore}
+            key = cache_key(f.__qualname__, version(bound.arguments), normalize_inputs(inputs, selections))
+
+            value = cache.get(key, default=_MISSING, retry=True)
+            if value is not _MISSING:
+                metrics.inc('dash_cache_hits_total', tag=tag)
+                return value
+
+            metrics.inc('dash_cache_misses_total', tag=tag)
+            value = f(*args, **kwargs)
+            cache.set(key, value, expire=expire, tag=tag, retry=True)
+            return value
+        return wrap
+    return decorator
+
+# drop the memoized results when the dataset version changes
+# the version is kept in state, which should not evict it, the results cache by default
+def sync_version(cache, version: str, tag=CALLBACK_TAG, state=None):
+    state = cache if state is None else state
+    key = f'{tag}:version'
+    with state.transact(retry=True):
+        if state.get(key) == version:
+            return False
+        state.set(key, version)
+    cache.evict(tag, retry=True)
+    return True
+
+# hits and misses of the memoized results from the metric totals of all workers, see helpers_metrics.shared_totals
+def cache_stats(cache, totals: dict, tag=CALLBACK_TAG):
+    hits = totals.get(('dash_cache_hits_total', (('tag', tag),)), 0)
+    misses = totals.get(('dash_cache_misses_total', (('tag', tag),)), 0)
+    total = hits + misses
+    return {
+        'hits' : hits,
+        'misses' : misses,
+        'hit_ratio' : hits / total if total > 0 else 0.0,
+        'size' : cache.volume(),
+    }
@@ -23,15 +23,23 @@ def card_tab(label='tab', id='id', content=html.Br()):
             ), className='mt-3'
         ), label=label, id=id, active_label_style={'color' : COLOR_1})
 
-# datatable wrapper
-def dash_table_interactive(df):
+# datatable wrapper, paged and sorted by a callback so only the visible page is sent to the browser
+def dash_table_interactive(id: str, columns: list, page_size=25):
         return dash_table.DataTable(
-            data=df.to_dict('records'),
+            id=id,
+            data=[],
             columns=[
-                {"name": i, "id": i, "deletable": False, "selectable": True} for i in df.columns
+                {"name": i, "id": i, "deletable": False, "selectable": True} for i in columns
             ],
             editable=False,
-            sort_action='native')
+            page_action='custom',
+            page_current=0,
+            page_size=page_size,
+            page_count=1,
+            sort_action='custom',
+            sort_mode='single',
+            sort_by=[],
+            style_cell={'text-align' : 'left'})
 
 # datatable wrapper simple
 def dash_table_simple(df):
@@ -64,6 +64,21 @@ def df_persona_stream_cleaner(df, col='persona_stream'):
     )
     return df
 
+# map each persona stream to its own bit
+def persona_stream_bits(streams: list):
+    return {stream : 1 << i for i, stream in enumerate(sorted(set(streams)))}
+
+# encode persona stream lists as multi-hot bitmasks
+def df_persona_stream_encoder(df, bits: dict, col='persona_stream', out_col='persona_stream_bits'):
+    # up to 64 streams fit a native integer, beyond that fall back to python ints
+    dtype = 'uint64' if len(bits) <= 64 else 'object'
+    df[out_col] = (
+        df[col]
+        .apply(lambda x : sum(bits[i] for i in set(x)))
+        .astype(dtype)
+    )
+    return df
+
 # get top n skills for a list of consultants
 def df_top_n_skills(df, consultants: list, top_n: int):
 
@@ -119,3 +134,16 @@ def df_filter_multiple_simple(df, inputs: list, col: str):
         .drop(columns='_temp')
     )
     return df
+
+# filter by multiple selections against a bitmask column, see df_persona_stream_encoder
+def df_filter_bits(df, inputs: list, bits: dict, col='persona_stream_bits'):
+
+    # nothing is selected
+    if not isinstance(inputs, list) or len(inputs) == 0:
+        return df
+
+    selected = sum(bits.get(i, 0) for i in set(inputs))
+    if df[col].dtype != 'object':
+        selected = df[col].dtype.type(selected)
+    df = df[(df[col].values & selected) != 0]
+    return df
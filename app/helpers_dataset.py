@@ -0,0 +1,286 @@
+import os
+import copy
+import fcntl
+import logging
+import pickle
+import tempfile
+import threading
+import time
+from array import array
+from glob import glob
+import numpy as np
+import pandas as pd
+from helpers_data import (
+    df_renamer,
+    df_persona_stream_cleaner
+)
+from helpers_matrix import skills_matrix_from_ratings, MISSING_RATING
+from helpers_cache import file_digest
+
+# bump when helpers_data or helpers_matrix change what a snapshot holds
+PIPELINE_VERSION = 7
+
+# whole ratings outside this range are kept but reported
+MIN_RATING, MAX_RATING = 0, 5
+MALFORMED_LOG_LIMIT = 20 # malformed cells listed in the log
+
+# numeric arrays saved next to the snapshot and memory-mapped read-only, so workers share their pages
+MAPPED_ARRAYS = ['ratings', 'rating_cube', 'rating_rank', 'rating_vectors', 'rating_norms']
+
+SNAPSHOT_DIR = os.getenv('SNAPSHOT_DIR', 'tmp')
+SNAPSHOT_PREFIX = 'skills_matrix'
+SNAPSHOT_KEEP = 2 # newest snapshots kept, workers still on the previous version can go on loading it
+
+logger = logging.getLogger(__name__)
+
+# column names the way pd.read_excel gives them, blank headers are unnamed and repeated ones numbered
+def sheet_headers(row: tuple):
+    headers, seen = [], {}
+    for i, header in enumerate(row):
+        header = f'Unnamed: {i}' if header is None else header
+        if header in seen:
+            seen[header] += 1
+            header = f'{header}.{seen[header]}'
+        seen.setdefault(header, 0)
+        headers.append(header)
+    return headers
+
+# technology attributes the way pd.read_excel gives them, whole floats as int and blanks as nan
+def sheet_value(value):
+    if value is None:
+        return np.nan
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+# rating cell as stored in the matrix, with the problem when it is not a whole number from 0 to 5
+# like pd.to_numeric(errors='coerce') and astype('int8'), text is parsed and fractions are truncated
+def parse_rating(value):
+    if value is None:
+        return MISSING_RATING, None
+    problem = None
+    if isinstance(value, str):
+        try:
+            value = float(value)
+        except ValueError:
+            return MISSING_RATING, 'not a number, read as blank'
+        problem = 'number stored as text'
+    elif isinstance(value, bool) or not isinstance(value, (int, float)):
+        return MISSING_RATING, 'not a number, read as blank'
+    if value != value:
+        return MISSING_RATING, problem
+    if not -128 <= value <= 127:
+        return MISSING_RATING, 'out of range, read as blank'
+    if not MIN_RATING <= value <= MAX_RATING:
+        problem = f'outside {MIN_RATING} to {MAX_RATING}'
+    elif value != int(value):
+        problem = 'not a whole number, truncated'
+    return int(value), problem
+
+# stream the ratings sheet in read-only mode, without the columns after implementability
+# ratings go straight into an int8 buffer, so memory grows by one byte per rating instead of a cell object
+# returns the technology columns, the consultant names, the ratings (consultants x technologies) and the
+# malformed rating cells as (cell, value, problem), blank rows are skipped
+def read_ratings_sheet(path: str, sheet_name='Ratings', after_var='relevance', before_var='pure_count_4_5', last_var='implementability'):
+    from openpyxl import load_workbook
+    from openpyxl.utils import get_column_letter
+
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        sheet = workbook[sheet_name]
+        headers = sheet_headers(next(sheet.iter_rows(max_row=1, values_only=True), ()))
+        cols = list(df_renamer(pd.DataFrame(columns=headers)).columns)
+        first, end, last = cols.index(after_var) + 1, cols.index(before_var), cols.index(last_var) + 1
+        id_cols = list(range(first)) + list(range(end, last))
+        letters = [get_column_letter(i + 1) for i in range(last)]
+
+        id_values = [[] for _ in id_cols]
+        ratings = array('b')
+        malformed = []
+        for row_number, row in enumerate(sheet.iter_rows(min_row=2, max_col=last, values_only=True), start=2):
+            if len(row) < last:
+                row = tuple(row) + (None,) * (last - len(row))
+            if all(value is None for value in row):
+                continue
+            for values, i in zip(id_values, id_cols):
+                values.append(sheet_value(row[i]))
+            for i in range(first, end):
+                value = row[i]
+                if type(value) is int and MIN_RATING <= value <= MAX_RATING:
+                    ratings.append(value)
+                    continue
+                rating, problem = parse_rating(value)
+                ratings.append(rating)
+                if problem is not None:
+                    malformed.append((f'{letters[i]}{row_number}', value, problem))
+    finally:
+        workbook.close()
+
+    df = pd.DataFrame({cols[i] : values for i, values in zip(id_cols, id_values)}, columns=[cols[i] for i in id_cols])
+    ratings = np.frombuffer(ratings, dtype='int8').reshape(len(df), end - first)
+    consultants = np.array(cols[first:end], dtype=object)
+    return df, consultants, np.ascontiguousarray(ratings.T), malformed
+
+# parse the workbook into a skills matrix
+def read_skills_matrix(path: str):
+    df, consultants, ratings, malformed = read_ratings_sheet(path)
+    if len(malformed) > 0:
+        logger.warning(
+            '%d malformed ratings in %s: %s', len(malformed), path,
+            '; '.join(f'{cell} {value!r} {problem}' for cell, value, problem in malformed[:MALFORMED_LOG_LIMIT])
+        )
+    matrix = skills_matrix_from_ratings(df.pipe(df_persona_stream_cleaner), consultants, ratings)
+    matrix.malformed_cells = malformed
+    return matrix
+
+# snapshot file for a workbook version
+def snapshot_path(version: str, snapshot_dir=SNAPSHOT_DIR):
+    return os.path.join(snapshot_dir, f'{SNAPSHOT_PREFIX}-{version}-v{PIPELINE_VERSION}.pkl')
+
+# file of a memory-mapped array of a snapshot
+def array_path(path: str, name: str):
+    return path.replace('.pkl', f'.{name}.npy')
+
+# write to a temporary file and move it in place
+def write_atomic(path: str, write):
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    with os.fdopen(fd, 'wb') as f:
+        write(f)
+    os.replace(tmp_path, path)
+
+# remove all but the newest snapshots with their arrays, called under the lock of load_skills_matrix
+def prune_snapshots(snapshot_dir: str, keep=SNAPSHOT_KEEP):
+    snapshots = sorted(glob(os.path.join(snapshot_dir, f'{SNAPSHOT_PREFIX}-*.pkl')), key=os.path.getmtime, reverse=True)
+    kept = {path for snapshot in snapshots[:keep] for path in [snapshot] + [array_path(snapshot, name) for name in MAPPED_ARRAYS]}
+    for old_path in glob(os.path.join(snapshot_dir, f'{SNAPSHOT_PREFIX}-*')):
+        if old_path not in kept:
+            os.remove(old_path)
+
+# write the snapshot and prune the older ones, the pickle goes last as it marks the snapshot complete
+def write_snapshot(matrix, path: str):
+    snapshot_dir = os.path.dirname(path)
+    os.makedirs(snapshot_dir, exist_ok=True)
+
+    skeleton = copy.copy(matrix)
+    for name in MAPPED_ARRAYS:
+        write_atomic(array_path(path, name), lambda f : np.save(f, getattr(matrix, name), allow_pickle=False))
+        setattr(skeleton, name, None)
+    write_atomic(path, lambda f : pickle.dump(skeleton, f, protocol=pickle.HIGHEST_PROTOCOL))
+    prune_snapshots(snapshot_dir)
+
+# read the snapshot and attach its arrays read-only
+def read_snapshot(path: str):
+    with open(path, 'rb') as f:
+        matrix = pickle.load(f)
+    for name in MAPPED_ARRAYS:
+        setattr(matrix, name, np.load(array_path(path, name), mmap_mode='r'))
+    return matrix
+
+# load the skills matrix from its snapshot, the workbook is parsed only when it changed
+def load_skills_matrix(path: str, snapshot_dir=SNAPSHOT_DIR):
+    version = file_digest(path)
+    snapshot = snapshot_path(version, snapshot_dir)
+    try:
+        return read_snapshot(snapshot)
+    except (FileNotFoundError, EOFError, ValueError, pickle.UnpicklingError):
+        pass
+
+    # one process parses the workbook, the others wait and read its snapshot
+    os.makedirs(snapshot_dir, exist_ok=True)
+    with open(os.path.join(snapshot_dir, f'{SNAPSHOT_PREFIX}.lock'), 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            return read_snapshot(snapshot)
+        except (FileNotFoundError, EOFError, ValueError, pickle.UnpicklingError):
+            pass
+        matrix = read_skills_matrix(path)
+        matrix.version = version
+        write_snapshot(matrix, snapshot)
+    return read_snapshot(snapshot)
+
+# shared cache key of the matrix version every worker should be on
+DATASET_VERSION_KEY = 'dataset:version'
+
+# current skills matrix of the app, replaced as a whole when the workbook changes
+# the version in use is published in the shared cache and every worker follows it at the start of a request,
+# so a page and the callbacks it triggers are answered from the same matrix whichever worker takes them
+# callbacks read dataset.matrix once and keep using that matrix, so they see a consistent snapshot
+class Dataset:
+
+    def __init__(self, path: str, cache, snapshot_dir=SNAPSHOT_DIR, key=DATASET_VERSION_KEY):
+        self.path = path
+        self.cache = cache
+        self.snapshot_dir = snapshot_dir
+        self.key = key
+        self._stat = self._file_stat()
+        self.matrix = load_skills_matrix(path, snapshot_dir)
+        self.cache.set(key, self.matrix.version, retry=True)
+        self._listeners = []
+        self._lock = threading.Lock()
+        self._watcher = None
+
+    def _file_stat(self):
+        stat = os.stat(self.path)
+        return stat.st_mtime_ns, stat.st_size
+
+    @property
+    def version(self):
+        return self.matrix.version
+
+    # call f with the new matrix after every swap
+    def subscribe(self, f):
+        self._listeners.append(f)
+
+    # load the workbook when its content changed and publish its version, returns whether it did
+    def refresh(self):
+        with self._lock:
+            stat = self._file_stat()
+            if stat == self._stat:
+                return False
+            if file_digest(self.path) == self.cache.get(self.key, retry=True):
+                self._stat = stat
+                return False
+            matrix = load_skills_matrix(self.path, self.snapshot_dir)
+            self.cache.set(self.key, matrix.version, retry=True)
+            self._stat = stat
+        logger.info('skills matrix version %s published', matrix.version)
+        self.follow()
+        return True
+
+    # swap in the published version when this process is on another one, returns whether it did
+    def follow(self):
+        version = self.cache.get(self.key, retry=True)
+        if version is None or version == self.matrix.version:
+            return False
+        with self._lock:
+            if version == self.matrix.version:
+                return False
+            try:
+                matrix = read_snapshot(snapshot_path(version, self.snapshot_dir))
+            except (FileNotFoundError, EOFError, ValueError, pickle.UnpicklingError):
+                logger.exception('failed to load the skills matrix version %s', version)
+                return False
+            self.matrix = matrix
+        logger.info('skills matrix reloaded, version %s', version)
+        for f in self._listeners:
+            f(matrix)
+        return True
+
+    # check the workbook every interval seconds in a daemon thread, a workbook that fails to load is retried
+    # the processes sharing the cache take turns, so the workbook is checked once per interval
+    def watch(self, interval: float):
+        if self._watcher is not None and self._watcher.is_alive():
+            return self._watcher
+
+        def run():
+            while True:
+                try:
+                    if self.cache.add(f'{self.key}:checked', True, expire=interval, retry=True):
+                        self.refresh()
+                except Exception:
+                    logger.exception('failed to reload the skills matrix from %s', self.path)
+                time.sleep(interval)
+
+        self._watcher = threading.Thread(target=run, name='dataset-watcher', daemon=True)
+        self._watcher.start()
+        return self._watcher
@@ -0,0 +1,93 @@
+import numpy as np
+import pandas as pd
+
+# technology attributes the tabs filter on by value, persona streams are matched by their bits
+INDEXED_COLUMNS = ['platform_area_categories', 'relevance', 'technology']
+
+# a selection is active when it is a non-empty list, like in helpers_data.df_filter_multiple
+is_selected = lambda inputs : isinstance(inputs, list) and len(inputs) > 0
+
+# selections of a callback over the skills matrix, compiled by SkillsMatrix.select into one set of technologies
+# the rating range applies to the ratings of the selected consultants and technologies, None leaves it open
+class FilterSpec:
+
+    def __init__(self, streams=None, categories=None, relevance=None, technologies=None, consultants=None, min_rating=None, max_rating=None):
+        self.streams = streams
+        self.categories = categories
+        self.relevance = relevance
+        self.technologies = technologies
+        self.consultants = consultants
+        self.min_rating = min_rating
+        self.max_rating = max_rating
+
+    # (column, selected values) of the active technology selections
+    def technology_predicates(self):
+        return [
+            (col, list(dict.fromkeys(inputs)))
+            for col, inputs in [
+                ('persona_stream', self.streams),
+                ('platform_area_categories', self.categories),
+                ('relevance', self.relevance),
+                ('technology', self.technologies),
+            ]
+            if is_selected(inputs)
+        ]
+
+    def __repr__(self):
+        selections = ', '.join(f'{name}={value!r}' for name, value in vars(self).items() if value is not None)
+        return f'FilterSpec({selections})'
+
+# positions of the technologies holding each value of the filtered columns, built once per matrix
+# a spec starts from its most selective predicate and the others only check the technologies left
+class TechnologyIndex:
+
+    def __init__(self, technologies: pd.DataFrame, stream_bits: dict):
+        self.size = len(technologies)
+        self.bits = technologies['persona_stream_bits'].to_numpy()
+        self.stream_bits = stream_bits
+        self.postings = {'persona_stream' : {
+            stream : np.flatnonzero([int(value) & bit != 0 for value in self.bits]) for stream, bit in stream_bits.items()
+        }}
+        self.codes, self.code_of = {}, {}
+        for col in INDEXED_COLUMNS:
+            codes, uniques = pd.factorize(technologies[col].astype(object))
+            order = np.argsort(codes, kind='stable')
+            bounds = np.searchsorted(codes[order], np.arange(len(uniques) + 1))
+            self.codes[col] = codes
+            self.code_of[col] = {value : code for code, value in enumerate(uniques)}
+            self.postings[col] = {value : np.sort(order[bounds[code]:bounds[code + 1]]) for code, value in enumerate(uniques)}
+
+    # technologies a predicate can keep at most, duplicates across values are counted twice
+    def estimate(self, col: str, values: list):
+        postings = self.postings[col]
+        return sum(len(postings[value]) for value in values if value in postings)
+
+    # technologies holding any of the values, in workbook order
+    def lookup(self, col: str, values: list):
+        postings = [self.postings[col][value] for value in values if value in self.postings[col]]
+        if len(postings) == 0:
+            return np.array([], dtype='int64')
+        return np.unique(np.concatenate(postings)) if len(postings) > 1 else postings[0]
+
+    # which of the candidates hold any of the values
+    def probe(self, col: str, values: list, candidates: np.ndarray):
+        if col == 'persona_stream':
+            selected = sum(self.stream_bits.get(value, 0) for value in values)
+            bits = self.bits[candidates]
+            if bits.dtype != 'object':
+                selected = bits.dtype.type(selected)
+            return (bits & selected) != 0
+        codes = [self.code_of[col][value] for value in values if value in self.code_of[col]]
+        return np.isin(self.codes[col][candidates], codes)
+
+    # positions of the technologies passing every selection of the spec, in workbook order
+    def select(self, spec: FilterSpec):
+        predicates = sorted(spec.technology_predicates(), key=lambda predicate : self.estimate(*predicate))
+        if len(predicates) == 0:
+            return np.arange(self.size)
+        candidates = self.lookup(*predicates[0])
+        for col, values in predicates[1:]:
+            if len(candidates) == 0:
+                break
+            candidates = candidates[self.probe(col, values, candidates)]
+        return candidates
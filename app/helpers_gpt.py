@@ -1,25 +1,62 @@
 import os
-import openai
-from tenacity import (
-    retry,
-    stop_after_attempt,
-    wait_random_exponential,
-)  # for exponential backoff
+import hashlib
+import json
+from functools import lru_cache
+from time import sleep, perf_counter, time
+from helpers_metrics import metrics
 
 
-# get the gpt api key and authenticate
+# get the gpt api key, openai is authenticated when it is imported
 API_KEY = os.getenv('GPT_API_KEY')
-openai.api_key = API_KEY
 
-# define the exponential back-off request
-@retry(wait=wait_random_exponential(min=1, max=60), stop=stop_after_attempt(6))
+SYSTEM_PROMPT = "You are a helpful assistant that writes staff profile summaries."
+SUMMARY_TTL = 30 * 24 * 60 * 60 # seconds a cached summary is kept
+SUMMARY_TAG = 'summary'
+GPT_BURST = 2 # summary requests that may start together after a quiet spell
+
+# token bucket kept in a diskcache, shared by all processes using that cache
+class SharedTokenBucket:
+
+    def __init__(self, cache, rate: float, capacity=1, name='gpt'):
+        self.cache = cache
+        self.rate = rate # tokens added per second
+        self.capacity = capacity
+        self.key = f'token_bucket:{name}'
+
+    def acquire(self):
+        while True:
+            with self.cache.transact(retry=True):
+                now = time()
+                tokens, updated = self.cache.get(self.key, default=(self.capacity, now), retry=True)
+                tokens = min(self.capacity, tokens + (now - updated) * self.rate)
+                if tokens >= 1:
+                    self.cache.set(self.key, (tokens - 1, now), retry=True)
+                    return
+                self.cache.set(self.key, (tokens, now), retry=True)
+                wait = (1 - tokens) / self.rate
+            sleep(wait)
+
+# chat completion with exponential back-off, openai is set up on the first call
+@lru_cache(maxsize=None)
+def completion_client():
+    import openai
+    from tenacity import (
+        retry,
+        stop_after_attempt,
+        wait_random_exponential,
+    )  # for exponential backoff
+    openai.api_key = API_KEY
+
+    # define the exponential back-off request
+    return retry(wait=wait_random_exponential(min=1, max=60), stop=stop_after_attempt(6))(openai.ChatCompletion.create)
+
 def completion_with_backoff(**kwargs):
-    return openai.ChatCompletion.create(**kwargs)
+    return completion_client()(**kwargs)
 
 # generate the prompt from data
-def generate_prompt_from_data(df, input_name: str, out_words: int):
+def generate_prompt_from_data(matrix, input_name: str, out_words: int):
     skill_list = (
-        df
+        matrix.to_frame(consultants=[input_name])
         .query('relevance in ["Focus", "Red hot"]')
         [['consultant_name', 'technology', 'skill_rating']]
         .query('consultant_name == @input_name')
@@ -37,17 +74,123 @@ def generate_prompt_from_data(df, input_name: str, out_words: int):
         input_name, ','.join(skill_list), input_name, input_name, out_words, input_name
     ).replace('\n', ' ').strip()
 
-# ask chat gpt
-def generate_profile_summary(df, input_name: str, out_words: int, gpt_model: str):
+# cache key of a summary, the hash of the exact request
+def summary_key(prompt: str, gpt_model: str):
+    payload = json.dumps([SYSTEM_PROMPT, prompt, gpt_model])
+    return '{}:{}'.format(SUMMARY_TAG, hashlib.sha256(payload.encode()).hexdigest())
+
+# cached summaries are tagged by consultant so they can be dropped when the ratings change
+summary_tag = lambda input_name : f'{SUMMARY_TAG}:{input_name}'
+
+# chat messages for a prompt
+def summary_messages(prompt: str):
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": prompt}
+    ]
+
+# a limiter paces the requests, without one every request waits a second
+def wait_for_request(limiter=None):
+    if limiter is not None:
+        limiter.acquire()
+    else:
+        sleep(1) # wait 1 second to prevent too many calls
+
+# ask chat gpt, summaries are read from and written to the cache when one is given
+def generate_profile_summary(matrix, input_name: str, out_words: int, gpt_model: str, cache=None, limiter=None, refresh=False):
 
     # input
-    prompt = generate_prompt_from_data(df, input_name, out_words)
-
-    response = completion_with_backoff(
-        model = gpt_model,
-        messages=[
-            {"role": "system", "content": "You are a helpful assistant that writes staff profile summaries."},
-            {"role": "user", "content": prompt}
-        ]
-    )
-    return response['choices'][0]['message']['content']
+    prompt = generate_prompt_from_data(matrix, input_name, out_words)
+    key = summary_key(prompt, gpt_model)
+    if cache is not None and not refresh:
+        summary = cache.get(key, retry=True)
+        metrics.inc('gpt_summary_cache_total', result='miss' if summary is None else 'hit')
+        if summary is not None:
+            return summary
+
+    wait_for_request(limiter)
+    try:
+        with metrics.timer('gpt_request_seconds', model=gpt_model, stream=False):
+            response = completion_with_backoff(
+                model = gpt_model,
+                messages=summary_messages(prompt)
+            )
+    except Exception:
+        metrics.inc('gpt_requests_total', model=gpt_model, outcome='error')
+        raise
+    metrics.inc('gpt_requests_total', model=gpt_model, outcome='ok')
+    summary = response['choices'][0]['message']['content']
+    if cache is not None:
+        cache.set(key, summary, expire=SUMMARY_TTL, tag=summary_tag(input_name), retry=True)
+    return summary
+
+# ask chat gpt and yield the response so far as tokens arrive
+# the time until the first token and the full response is recorded, without the wait for the limiter
+def stream_summary(prompt: str, gpt_model: str, limiter=None):
+    wait_for_request(limiter)
+    start = perf_counter()
+    summary = ''
+    outcome = 'error'
+    try:
+        response = completion_with_backoff(
+            model = gpt_model,
+            messages=summary_messages(prompt),
+            stream=True
+        )
+        for chunk in response:
+            delta = chunk['choices'][0].get('delta', {}).get('content')
+            if delta:
+                if not summary:
+                    metrics.observe('gpt_first_token_seconds', perf_counter() - start, model=gpt_model)
+                summary += delta
+                yield summary
+        outcome = 'ok'
+    except GeneratorExit:
+        outcome = 'cancelled'
+        raise
+    finally:
+        metrics.observe('gpt_request_seconds', perf_counter() - start, model=gpt_model, stream=True)
+        metrics.inc('gpt_requests_total', model=gpt_model, outcome=outcome)
+
+# summary job of a JobQueue, the payload is a (prompt, gpt_model, input_name) tuple
+# only complete summaries are cached
+def run_summary_job(payload, cache=None, limiter=None):
+    prompt, gpt_model, input_name = payload
+    summary = ''
+    for summary in stream_summary(prompt, gpt_model, limiter):
+        yield summary
+    if cache is not None and summary:
+        cache.set(summary_key(prompt, gpt_model), summary, expire=SUMMARY_TTL, tag=summary_tag(input_name), retry=True)
+
+# ask chat gpt and yield the summary so far as tokens arrive, a cached summary is yielded whole
+# with a job queue, identical requests in flight anywhere share one call
+def stream_profile_summary(matrix, input_name: str, out_words: int, gpt_model: str, cache=None, limiter=None, jobs=None):
+
+    # input
+    prompt = generate_prompt_from_data(matrix, input_name, out_words)
+    key = summary_key(prompt, gpt_model)
+    if cache is not None:
+        summary = cache.get(key, retry=True)
+        metrics.inc('gpt_summary_cache_total', result='miss' if summary is None else 'hit')
+        if summary is not None:
+            yield summary
+            return
+
+    if jobs is not None:
+        yield from jobs.stream(key, (prompt, gpt_model, input_name))
+    else:
+        yield from run_summary_job((prompt, gpt_model, input_name), cache, limiter)
+
+# drop the cached summaries of consultants whose ratings changed since the last call
+# the fingerprints are kept in state, which should not evict them, the summary cache by default
+def evict_changed_summaries(cache, matrix, state=None):
+    state = cache if state is None else state
+    key = f'{SUMMARY_TAG}:fingerprints'
+    fingerprints = matrix.consultant_fingerprints()
+    with state.transact(retry=True):
+        previous = state.get(key, default={}, retry=True)
+        state.set(key, fingerprints, retry=True)
+    changed = [name for name, fingerprint in previous.items() if fingerprints.get(name) != fingerprint]
+    for name in changed:
+        cache.evict(summary_tag(name), retry=True)
+    return changed
@@ -0,0 +1,203 @@
+import logging
+import threading
+import uuid
+from time import sleep, time
+
+# seconds a running job or a waiting caller is kept without renewal, a job is taken back
+# to the queue when its worker stops renewing it and dropped when no caller waits for it anymore
+LEASE_TTL = 5
+POLL_INTERVAL = 0.1 # seconds between checks of the shared state
+RESULT_TTL = 60 # seconds a finished result is kept for callers that attached late
+
+logger = logging.getLogger(__name__)
+
+# raised to callers of a job that failed
+class JobFailed(Exception):
+    pass
+
+# jobs keyed by their request and run by a bounded pool of worker threads in every process sharing the cache
+# callers asking for a job that is queued or running attach to it instead of starting another one
+# run gets the payload of a job and yields its partial results, the last one is the result
+# the result is stored as a tuple, empty when the job yielded nothing, so callers can tell it from no result yet
+class JobQueue:
+
+    def __init__(self, cache, run, name='jobs', workers=2, lease_ttl=LEASE_TTL, poll=POLL_INTERVAL, result_ttl=RESULT_TTL):
+        self.cache = cache
+        self.run = run
+        self.name = name
+        self.workers = workers # threads per process
+        self.lease_ttl = lease_ttl
+        self.poll = poll
+        self.result_ttl = result_ttl
+        self._threads = []
+
+    def _key(self, kind: str, key=None):
+        return f'{self.name}:{kind}' if key is None else f'{self.name}:{kind}:{key}'
+
+    def _count(self, stat: str):
+        self.cache.incr(self._key(stat), retry=True)
+
+    # keys of the running jobs with the expiry of their lease, expired leases are dropped
+    def _running(self):
+        now = time()
+        running = self.cache.get(self._key('running'), default={}, retry=True)
+        return {key : lease for key, lease in running.items() if lease[1] > now}
+
+    def _waiting(self, key: str):
+        return self._key('watch', key) in self.cache
+
+    # keep the job alive for the callers waiting for it
+    def _heartbeat(self, key: str):
+        self.cache.set(self._key('watch', key), True, expire=self.lease_ttl, retry=True)
+
+    # queue the job unless it is queued, running or finished, returns whether it was queued
+    # the error of an earlier run is dropped, so a retry does not fail with it
+    def submit(self, key: str, payload):
+        self._heartbeat(key)
+        with self.cache.transact(retry=True):
+            queue = self.cache.get(self._key('queue'), default=[], retry=True)
+            if key in queue or key in self._running() or self._key('result', key) in self.cache:
+                return False
+            self.cache.delete(self._key('error', key), retry=True)
+            self.cache.set(self._key('payload', key), payload, retry=True)
+            self.cache.set(self._key('queue'), queue + [key], retry=True)
+        self._count('submitted')
+        return True
+
+    # submit the job or attach to it, and yield its partial results until it finishes
+    # closing the generator detaches the caller, the job is cancelled once no caller is left
+    # only errors of runs failing after the caller attached are raised
+    def stream(self, key: str, payload):
+        attached = time()
+        if not self.submit(key, payload):
+            self._count('coalesced')
+        partial, checked = None, time()
+        while True:
+            result = self.cache.get(self._key('result', key), retry=True)
+            if result is not None:
+                yield from result
+                return
+            error = self.cache.get(self._key('error', key), retry=True)
+            if error is not None and error[0] >= attached:
+                raise JobFailed(error[1])
+            value = self.cache.get(self._key('partial', key), retry=True)
+            if value is not None and value != partial:
+                partial = value
+                yield value
+            # queue the job again when the worker running it went away
+            if time() - checked > self.lease_ttl:
+                self.submit(key, payload)
+                checked = time()
+            else:
+                self._heartbeat(key)
+            sleep(self.poll)
+
+    # take the oldest job someone still waits for, jobs without callers are dropped
+    def _take(self, token: str):
+        if not self.cache.get(self._key('queue'), retry=True):
+            return None, None
+        with self.cache.transact(retry=True):
+            queue = self.cache.get(self._key('queue'), default=[], retry=True)
+            dropped = [key for key in queue if not self._waiting(key)]
+            queue = [key for key in queue if key not in dropped]
+            key = queue.pop(0) if len(queue) > 0 else None
+            if key is not None:
+                running = self._running()
+                running[key] = (token, time() + self.lease_ttl)
+                self.cache.set(self._key('running'), running, retry=True)
+            if key is not None or len(dropped) > 0:
+                self.cache.set(self._key('queue'), queue, retry=True)
+            payload = self.cache.get(self._key('payload', key), retry=True) if key is not None else None
+        for key_dropped in dropped:
+            self.cache.delete(self._key('payload', key_dropped), retry=True)
+            self._count('cancelled')
+        return key, payload
+
+    # renew the lease of a running job, returns False when another worker took it over
+    def _renew(self, key: str, token: str):
+        with self.cache.transact(retry=True):
+            running = self._running()
+            if running.get(key, (None,))[0] != token:
+                return False
+            running[key] = (token, time() + self.lease_ttl)
+            self.cache.set(self._key('running'), running, retry=True)
+        return True
+
+    def _release(self, key: str, token: str):
+        with self.cache.transact(retry=True):
+            running = self._running()
+            if running.get(key, (None,))[0] == token:
+                del running[key]
+            self.cache.set(self._key('running'), running, retry=True)
+            self.cache.delete(self._key('partial', key), retry=True)
+            self.cache.delete(self._key('payload', key), retry=True)
+
+    # run one job, partial results are published every poll interval
+    # the lease is renewed from a second thread, so it holds while the job waits on a slow upstream
+    def _execute(self, key: str, payload, token: str):
+        values, result, published = None, (), 0.0
+        done = threading.Event()
+        def renew():
+            while not done.wait(self.lease_ttl / 3) and self._renew(key, token):
+                pass
+        threading.Thread(target=renew, name=f'{self.name}-lease', daemon=True).start()
+        try:
+            values = self.run(payload)
+            for value in values:
+                result = (value,)
+                if time() - published < self.poll:
+                    continue
+                if not self._waiting(key) or not self._renew(key, token):
+                    self._count('cancelled')
+                    return
+                self.cache.set(self._key('partial', key), value, expire=self.lease_ttl, retry=True)
+                published = time()
+            self.cache.set(self._key('result', key), result, expire=self.result_ttl, retry=True)
+            self._count('completed')
+        except Exception as e:
+            logger.exception('job %s failed', key)
+            self.cache.set(self._key('error', key), (time(), str(e)), expire=self.lease_ttl, retry=True)
+            self._count('failed')
+        finally:
+            done.set()
+            if values is not None:
+                values.close()
+            self._release(key, token)
+
+    def _work(self):
+        token = uuid.uuid4().hex
+        while True:
+            try:
+                key, payload = self._take(token)
+            except Exception:
+                logger.exception('failed to take a job from %s', self.name)
+                key = None
+            if key is None:
+                sleep(self.poll)
+                continue
+            try:
+                self._execute(key, payload, token)
+            except Exception:
+                logger.exception('failed to run job %s of %s', key, self.name)
+
+    # start the worker threads of this process
+    def start(self):
+        self._threads = [thread for thread in self._threads if thread.is_alive()]
+        for i in range(len(self._threads), self.workers):
+            thread = threading.Thread(target=self._work, name=f'{self.name}-worker-{i}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self._threads
+
+    # queue depth and job counters across all processes
+    def stats(self):
+        counter = lambda stat : self.cache.get(self._key(stat), default=0, retry=True)
+        return {
+            'queued' : len(self.cache.get(self._key('queue'), default=[], retry=True)),
+            'running' : len(self._running()),
+            'submitted' : counter('submitted'),
+            'coalesced' : counter('coalesced'),
+            'completed' : counter('completed'),
+            'failed' : counter('failed'),
+            'cancelled' : counter('cancelled'),
+        }
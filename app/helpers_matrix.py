@@ -0,0 +1,280 @@
+import hashlib
+import numpy as np
+import pandas as pd
+from functools import reduce
+from operator import or_
+from sys import getsizeof
+from helpers_data import (
+    persona_stream_bits, df_persona_stream_encoder
+)
+from helpers_team import min_cover
+from helpers_filter import FilterSpec, TechnologyIndex
+
+# stored in the ratings matrix for blank cells
+MISSING_RATING = -1
+
+# technology attributes kept as categorical codes
+CATEGORICAL_COLUMNS = ['platform_area_categories', 'relevance', 'implementability']
+
+# compact consultant x technology model of the ratings sheet
+class SkillsMatrix:
+
+    def __init__(self, technologies: pd.DataFrame, consultants: np.ndarray, ratings: np.ndarray, streams: list, id_vars: list):
+        self.technologies = technologies # one row per technology
+        self.consultants = consultants # consultant names, one per ratings row
+        self.ratings = ratings # int8, consultants x technologies
+        self.streams = streams
+        self.stream_bits = persona_stream_bits(streams)
+        self.id_vars = id_vars
+        self.version = None # content hash of the workbook, set by helpers_dataset
+        self.malformed_cells = [] # (cell, value, problem) of ratings that were not a whole number from 0 to 5
+        self.technology_names = technologies['technology'].to_numpy()
+        self.consultant_index = {name : i for i, name in enumerate(consultants)}
+        self.technology_index = TechnologyIndex(technologies, self.stream_bits)
+
+        # technology codes in name order, duplicated names share a code like in groupby('technology')
+        self.technology_codes, self.technology_uniques = pd.factorize(self.technology_names, sort=True)
+        self.consultant_codes = pd.factorize(consultants, sort=True)[0]
+
+        # consultant counts per technology and rating, technologies x ratings
+        self.rating_cube = np.stack(
+            [(ratings == r).sum(axis=0) for r in range(max(int(ratings.max(initial=0)), 0) + 1)],
+            axis=1
+        ).astype('int64')
+
+        # technologies of each consultant from the highest rating down, blanks last and ties in workbook order
+        self.rating_rank = np.argsort(-ratings, axis=1, kind='stable').astype('int32')
+
+        # ratings as float vectors with blanks at 0 and their norms, for similarity search
+        self.rating_vectors = np.clip(ratings, 0, None).astype('float32')
+        self.rating_norms = np.sqrt(np.einsum('ij,ij->i', self.rating_vectors, self.rating_vectors))
+
+    @property
+    def shape(self):
+        return self.ratings.shape
+
+    # sorted unique values of a technology attribute or of the consultant names
+    def options(self, col: str):
+        if col == 'consultant_name':
+            return sorted(self.consultants.tolist())
+        return sorted(self.technologies[col].dropna().unique().tolist())
+
+    def options_streams(self):
+        return list(self.streams)
+
+    # positions of the technologies selected by a spec, in workbook order, see helpers_filter.TechnologyIndex
+    def select(self, spec: FilterSpec):
+        return self.technology_index.select(spec)
+
+    # inclusive rating bounds of a spec, open ends take the lowest and highest rating, blanks are never in range
+    def rating_range(self, spec: FilterSpec):
+        min_rating = 0 if spec.min_rating is None else spec.min_rating
+        max_rating = self.rating_cube.shape[1] - 1 if spec.max_rating is None else spec.max_rating
+        return min_rating, max_rating
+
+    # rows of the consultants in workbook order, unknown names are skipped
+    def consultant_rows(self, consultants: list):
+        return np.array(sorted({self.consultant_index[c] for c in consultants if c in self.consultant_index}), dtype='int64')
+
+    # number of consultants rated within the range per technology, same as groupby('technology').count()
+    def rating_counts(self, spec: FilterSpec):
+        t_idx = self.select(spec)
+        min_rating, max_rating = self.rating_range(spec)
+        counts = self.rating_cube[t_idx, max(min_rating, 0):max(max_rating + 1, 0)].sum(axis=1)
+        counts = np.bincount(self.technology_codes[t_idx], weights=counts, minlength=len(self.technology_uniques))
+        found = np.flatnonzero(counts > 0)
+        df = pd.DataFrame({
+            'technology' : self.technology_uniques[found],
+            'rating_counts' : counts[found].astype('int64')
+        })
+        return df
+
+    # top n skills of the spec's consultants, same as helpers_data.df_top_n_skills
+    # the union of each consultant's first top_n ranked technologies left by the spec, rated for all of them
+    def top_n_skills(self, spec: FilterSpec, top_n: int):
+        consultants = spec.consultants or []
+        tech_mask = np.zeros(self.shape[1], dtype=bool)
+        tech_mask[self.select(spec)] = True
+        top = np.zeros(self.shape[1], dtype=bool)
+        for c in self.consultant_rows(consultants):
+            ranked = self.rating_rank[c]
+            top[ranked[tech_mask[ranked]][:top_n]] = True
+
+        # technologies are matched by name
+        tech_mask = tech_mask & np.isin(self.technology_codes, self.technology_codes[top])
+        return (
+            self.to_frame(consultants=consultants, tech_mask=tech_mask)
+            .reset_index(drop=True)
+        )
+
+    # consultants with the most similar ratings over the technologies of the spec, by cosine similarity
+    def similar_consultants(self, consultant: str, top_k: int, spec=None):
+        row = self.consultant_index.get(consultant)
+        if row is None:
+            return pd.DataFrame({'consultant_name' : [], 'similarity' : []})
+
+        # all technologies use the precomputed norms, otherwise only the selected columns are gathered
+        t_idx = self.select(spec or FilterSpec())
+        if len(t_idx) == self.shape[1]:
+            vectors, norms = self.rating_vectors, self.rating_norms
+        else:
+            vectors = self.rating_vectors[:, t_idx]
+            norms = np.sqrt(np.einsum('ij,ij->i', vectors, vectors))
+
+        scores = vectors @ vectors[row]
+        scale = norms * norms[row]
+        scores = np.divide(scores, scale, out=np.zeros_like(scores), where=scale > 0)
+        scores[row] = -np.inf
+
+        # best top_k, ties in workbook order
+        best = np.argsort(-scores, kind='stable')[:min(top_k, len(scores) - 1)]
+        df = pd.DataFrame({
+            'consultant_name' : self.consultants[best],
+            'similarity' : scores[best].astype('float64')
+        })
+        return df
+
+    # bitset per consultant row of the required technologies rated min_rating or above, bit i is technologies[i]
+    def coverage_bits(self, technologies: list, min_rating: int):
+        position = {name : i for i, name in enumerate(technologies)}
+        t_idx = self.select(FilterSpec(technologies=technologies))
+        block = self.ratings[:, t_idx] >= min_rating
+        covered = np.zeros((self.shape[0], len(technologies)), dtype=bool)
+        for j, t in enumerate(t_idx):
+            covered[:, position[self.technology_names[t]]] |= block[:, j]
+        packed = np.packbits(covered, axis=1, bitorder='little')
+        return {
+            row : int.from_bytes(packed[row].tobytes(), 'little')
+            for row in np.flatnonzero(covered.any(axis=1))
+        }
+
+    # smallest teams covering the required technologies at min_rating or above, see helpers_team.min_cover
+    # consultants with the same coverage are interchangeable and listed together
+    def build_team(self, technologies: list, min_rating: int, time_budget=0.5, max_teams=5):
+        technologies = list(dict.fromkeys(technologies))
+        groups = {}
+        for row, bits in self.coverage_bits(technologies, min_rating).items():
+            groups.setdefault(bits, []).append(self.consultants[row])
+
+        target = (1 << len(technologies)) - 1
+        teams, optimal = min_cover(list(groups), target, time_budget=time_budget, max_teams=max_teams)
+        covered = reduce(or_, groups, 0)
+        df = pd.DataFrame(
+            [
+                {
+                    'team' : i + 1,
+                    'consultants' : groups[bits],
+                    'technologies' : [name for j, name in enumerate(technologies) if bits >> j & 1],
+                }
+                for i, team in enumerate(teams) for bits in team
+            ],
+            columns=['team', 'consultants', 'technologies']
+        )
+        uncovered = [name for j, name in enumerate(technologies) if not covered >> j & 1]
+        return df, uncovered, optimal
+
+    # consultants rated within the range for the technologies of the spec
+    def search(self, spec: FilterSpec):
+        t_idx = self.select(spec)
+        min_rating, max_rating = self.rating_range(spec)
+        block = self.ratings[:, t_idx]
+        c, t = np.nonzero((block >= min_rating) & (block <= max_rating))
+        df = (
+            pd.DataFrame({
+                'consultant_name' : self.consultants[c],
+                'skill_rating' : block[c, t].astype('float64'),
+                'technology' : self.technology_names[t_idx[t]],
+            })
+            .sort_values(by=['technology', 'skill_rating', 'consultant_name'], ascending=[True, False, True])
+        )
+        return df
+
+    # one page of the search results sorted by one of their columns, with the number of rows and consultants found
+    # ties keep the order of search, by technology, highest rating and name, only the page is built into a frame
+    def search_page(self, spec: FilterSpec, sort_by=None, descending=False, page=0, page_size=25):
+        t_idx = self.select(spec)
+        min_rating, max_rating = self.rating_range(spec)
+        block = self.ratings[:, t_idx]
+        c, t = np.nonzero((block >= min_rating) & (block <= max_rating))
+        keys = {
+            'consultant_name' : self.consultant_codes[c],
+            'skill_rating' : block[c, t].astype('int16'),
+            'technology' : self.technology_codes[t_idx[t]],
+        }
+
+        # np.lexsort sorts by the last key first
+        sort_keys = [keys['consultant_name'], -keys['skill_rating'], keys['technology']]
+        if sort_by is not None:
+            sort_keys.append(-keys[sort_by] if descending else keys[sort_by])
+        rows = np.lexsort(sort_keys)[page * page_size:(page + 1) * page_size]
+        df = pd.DataFrame({
+            'consultant_name' : self.consultants[c[rows]],
+            'skill_rating' : keys['skill_rating'][rows].astype('int64'),
+            'technology' : self.technology_names[t_idx[t[rows]]],
+        })
+        return df, len(c), len(np.unique(c))
+
+    # long frame in the same shape as helpers_data.df_melt_ratings
+    def to_frame(self, consultants=None, tech_mask=None):
+        n_consultants, n_technologies = self.shape
+        c_idx = np.arange(n_consultants) if consultants is None else self.consultant_rows(consultants)
+        t_idx = np.arange(n_technologies) if tech_mask is None else np.flatnonzero(tech_mask)
+
+        ratings = self.ratings[np.ix_(c_idx, t_idx)].astype('float64')
+        ratings[ratings == MISSING_RATING] = np.nan
+
+        technologies = self.technologies.iloc[t_idx][self.id_vars]
+        df = (
+            technologies.iloc[np.tile(np.arange(len(t_idx)), len(c_idx))]
+            .astype({col : 'object' for col in CATEGORICAL_COLUMNS if col in self.id_vars})
+            .assign(
+                consultant_name=np.repeat(self.consultants[c_idx], len(t_idx)),
+                skill_rating=ratings.ravel()
+            )
+        )
+        df.index = (c_idx[:, None] * n_technologies + t_idx[None, :]).ravel()
+        return df
+
+    # hash per consultant of their ratings and the technologies they are for, changes when either does
+    def consultant_fingerprints(self):
+        technologies = hashlib.sha1(
+            self.technologies[['technology', 'relevance']].astype(str).to_csv(index=False).encode()
+        ).digest()
+        return {
+            name : hashlib.sha1(technologies + np.ascontiguousarray(self.ratings[row]).tobytes()).hexdigest()
+            for row, name in enumerate(self.consultants)
+        }
+
+    # approximate memory held by the model in bytes
+    def memory_usage(self):
+        return int(
+            self.ratings.nbytes
+            + self.technologies.memory_usage(deep=True).sum()
+            + sum(getsizeof(x) for streams in self.technologies['persona_stream'] for x in streams)
+            + self.consultants.nbytes + sum(getsizeof(x) for x in self.consultants)
+        )
+
+# build the skills matrix from the cleaned ratings sheet, see helpers_data.df_melt_ratings
+def build_skills_matrix(df, after_var='relevance', before_var='pure_count_4_5'):
+    cols = list(df.columns)
+    id_vars = cols[:cols.index(after_var)+1] + cols[cols.index(before_var):]
+    value_vars = cols[cols.index(after_var)+1:cols.index(before_var)]
+
+    # ratings as int8, consultants x technologies
+    ratings = df[value_vars].apply(pd.to_numeric, errors='coerce').to_numpy(dtype='float64').T
+    ratings = np.ascontiguousarray(np.where(np.isnan(ratings), MISSING_RATING, ratings).astype('int8'))
+    return skills_matrix_from_ratings(df[id_vars], np.array(value_vars, dtype=object), ratings)
+
+# build the skills matrix from the cleaned technology columns and the int8 ratings, consultants x technologies
+def skills_matrix_from_ratings(df, consultants: np.ndarray, ratings: np.ndarray):
+    id_vars = list(df.columns)
+
+    # technology dimension table
+    streams = sorted(df['persona_stream'].explode().unique().tolist())
+    technologies = (
+        df
+        .reset_index(drop=True)
+        .pipe(df_persona_stream_encoder, persona_stream_bits(streams))
+        .astype({col : 'category' for col in CATEGORICAL_COLUMNS if col in id_vars})
+    )
+    return SkillsMatrix(technologies, consultants, ratings, streams, id_vars)
@@ -0,0 +1,243 @@
+import logging
+import os
+import threading
+from bisect import bisect_left
+from functools import wraps
+from time import perf_counter, sleep, time
+from flask import Response, g, request
+
+# latency buckets in seconds and payload size buckets in bytes
+LATENCY_BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60]
+SIZE_BUCKETS = [256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304]
+
+METRICS_TAG = 'metrics'
+FLUSH_INTERVAL = 5 # seconds between flushes of a process' metrics to the shared cache
+
+logger = logging.getLogger(__name__)
+
+# name : (type, help, buckets)
+METRICS = {
+    'dash_callback_seconds' : ('histogram', 'Time to answer a callback request.', LATENCY_BUCKETS),
+    'dash_callback_response_bytes' : ('histogram', 'Size of the serialized callback response.', SIZE_BUCKETS),
+    'dash_callback_requests_total' : ('counter', 'Callback requests by status code.', None),
+    'dash_background_job_seconds' : ('histogram', 'Run time of a background callback job.', LATENCY_BUCKETS),
+    'gpt_request_seconds' : ('histogram', 'Time of a GPT request until the full response.', LATENCY_BUCKETS),
+    'gpt_first_token_seconds' : ('histogram', 'Time of a streamed GPT request until the first token.', LATENCY_BUCKETS),
+    'gpt_requests_total' : ('counter', 'GPT requests by outcome.', None),
+    'gpt_summary_cache_total' : ('counter', 'Profile summary cache lookups by result.', None),
+    'dash_cache_hits_total' : ('counter', 'Memoized callback results served from the cache.', None),
+    'dash_cache_misses_total' : ('counter', 'Memoized callback results computed.', None),
+    'api_requests_total' : ('counter', 'JSON api requests by status code.', None),
+}
+
+# metrics of this process, added to the totals in the shared cache by flush
+class Registry:
+
+    def __init__(self):
+        self._values = {}
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        self._flusher = None
+
+    # a forked process starts empty, its parent flushes what it had recorded
+    def _local_values(self):
+        if self._pid != os.getpid():
+            self._values, self._pid = {}, os.getpid()
+        return self._values
+
+    def inc(self, name: str, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            values = self._local_values()
+            values[key] = values.get(key, 0) + value
+
+    # histograms hold their bucket counts followed by the sum and count
+    def observe(self, name: str, value: float, **labels):
+        buckets = METRICS[name][2]
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            values = self._local_values()
+            counts = values.get(key)
+            if counts is None:
+                counts = values[key] = [0] * (len(buckets) + 3)
+            counts[bisect_left(buckets, value)] += 1
+            counts[-2] += value
+            counts[-1] += 1
+
+    # time a block into a histogram
+    def timer(self, name: str, **labels):
+        return Timer(self, name, labels)
+
+    # add the metrics of this process to the totals and record its memory and cpu
+    def flush(self, cache):
+        with self._lock:
+            values, self._values = self._local_values(), {}
+        with cache.transact(retry=True):
+            totals = cache.get(f'{METRICS_TAG}:totals', default={}, retry=True)
+            for key, value in values.items():
+                if isinstance(value, list):
+                    total = totals.get(key, [0] * len(value))
+                    totals[key] = [a + b for a, b in zip(total, value)]
+                else:
+                    totals[key] = totals.get(key, 0) + value
+            cache.set(f'{METRICS_TAG}:totals', totals, retry=True)
+
+            processes = cache.get(f'{METRICS_TAG}:processes', default={}, retry=True)
+            now = time()
+            processes = {pid : stats for pid, stats in processes.items() if now - stats['time'] < 3 * FLUSH_INTERVAL}
+            processes[os.getpid()] = process_stats()
+            cache.set(f'{METRICS_TAG}:processes', processes, retry=True)
+
+    # flush every interval seconds in a daemon thread
+    def start(self, cache, interval=FLUSH_INTERVAL):
+        if self._flusher is not None and self._flusher.is_alive():
+            return self._flusher
+
+        def run():
+            while True:
+                sleep(interval)
+                try:
+                    self.flush(cache)
+                except Exception:
+                    logger.exception('failed to flush the metrics')
+
+        self._flusher = threading.Thread(target=run, name='metrics-flusher', daemon=True)
+        self._flusher.start()
+        return self._flusher
+
+class Timer:
+
+    def __init__(self, registry: Registry, name: str, labels: dict):
+        self.registry = registry
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.registry.observe(self.name, perf_counter() - self.start, **self.labels)
+        return False
+
+# the registry of this process
+metrics = Registry()
+
+# totals of every process as of their last flush
+def shared_totals(cache):
+    return cache.get(f'{METRICS_TAG}:totals', default={}, retry=True)
+
+def process_stats():
+    import psutil
+    process = psutil.Process()
+    cpu = process.cpu_times()
+    return {
+        'time' : time(),
+        'rss' : process.memory_info().rss,
+        'cpu' : cpu.user + cpu.system,
+        'threads' : process.num_threads(),
+    }
+
+# time a background callback job, the job runs in its own process so it flushes when done
+def instrument_job(cache):
+    def decorator(f):
+        @wraps(f)
+        def wrap(*args, **kwargs):
+            try:
+                with metrics.timer('dash_background_job_seconds', callback=f.__name__):
+                    return f(*args, **kwargs)
+            finally:
+                metrics.flush(cache)
+        return wrap
+    return decorator
+
+def format_labels(labels: tuple, **extra):
+    labels = list(labels) + list(extra.items())
+    if len(labels) == 0:
+        return ''
+    escape = lambda value : str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return '{' + ','.join(f'{name}="{escape(value)}"' for name, value in labels) + '}'
+
+# (name, type, help, value) of the memoized callback results, from helpers_cache.cache_stats
+def cache_gauges(stats: dict):
+    return [
+        ('dash_cache_hit_ratio', 'gauge', 'Share of memoized callback results served from the cache.', stats['hit_ratio']),
+        ('dash_cache_bytes', 'gauge', 'Size of the results cache on disk.', stats['size']),
+    ]
+
+# (name, type, help, value) of a job queue, from helpers_jobs.JobQueue.stats
+def job_gauges(stats: dict, prefix: str):
+    return [
+        (f'{prefix}_queued', 'gauge', 'Jobs waiting for a worker.', stats['queued']),
+        (f'{prefix}_running', 'gauge', 'Jobs running.', stats['running']),
+    ] + [
+        (f'{prefix}_{stat}_total', 'counter', f'Jobs {stat}.', stats[stat])
+        for stat in ['submitted', 'coalesced', 'completed', 'failed', 'cancelled']
+    ]
+
+# prometheus text format of the totals, the gauges and every live process
+def render_metrics(totals: dict, processes: dict, gauges: list):
+    lines = []
+    for name, (kind, help_text, buckets) in METRICS.items():
+        series = sorted((key[1], value) for key, value in totals.items() if key[0] == name)
+        lines += [f'# HELP {name} {help_text}', f'# TYPE {name} {kind}']
+        for labels, value in series:
+            if kind == 'counter':
+                lines.append(f'{name}{format_labels(labels)} {value}')
+                continue
+            cumulative = 0
+            for bound, count in zip(buckets + ['+Inf'], value[:-2]):
+                cumulative += count
+                lines.append(f'{name}_bucket{format_labels(labels, le=bound)} {cumulative}')
+            lines.append(f'{name}_sum{format_labels(labels)} {value[-2]}')
+            lines.append(f'{name}_count{format_labels(labels)} {value[-1]}')
+
+    for name, kind, help_text, value in gauges:
+        lines += [f'# HELP {name} {help_text}', f'# TYPE {name} {kind}', f'{name} {value}']
+    for name, key, kind, help_text in [
+        ('process_resident_memory_bytes', 'rss', 'gauge', 'Resident memory of a worker process.'),
+        ('process_cpu_seconds_total', 'cpu', 'counter', 'User and system cpu time of a worker process.'),
+        ('process_threads', 'threads', 'gauge', 'Threads of a worker process.'),
+    ]:
+        lines += [f'# HELP {name} {help_text}', f'# TYPE {name} {kind}']
+        for pid, stats in sorted(processes.items()):
+            lines.append(f'{name}{format_labels((("pid", pid),))} {stats[key]}')
+    return '\n'.join(lines) + '\n'
+
+# time every callback request and record its response size, and serve /metrics behind the app's auth
+# gauges returns the (name, type, help, value) of the shared state to report
+def instrument_server(app, cache, auth, gauges, path='/metrics'):
+    server = app.server
+    callback_names = lambda output : app.callback_map[output]['callback'].__name__ if output in app.callback_map else 'unknown'
+
+    @server.before_request
+    def start_timer():
+        g.metrics_start = perf_counter()
+
+    @server.after_request
+    def record(response):
+        start = g.pop('metrics_start', None)
+        if start is None:
+            return response
+        if request.path.endswith('/_dash-update-component'):
+            body = request.get_json(silent=True) or {}
+            name = callback_names(body.get('output'))
+            metrics.observe('dash_callback_seconds', perf_counter() - start, callback=name)
+            metrics.observe('dash_callback_response_bytes', response.content_length or 0, callback=name)
+            metrics.inc('dash_callback_requests_total', callback=name, status=response.status_code)
+        elif request.blueprint == 'api':
+            metrics.inc('api_requests_total', endpoint=request.endpoint, status=response.status_code)
+        return response
+
+    def serve_metrics():
+        if not auth.is_authorized():
+            return auth.login_request()
+        metrics.flush(cache)
+        text = render_metrics(
+            shared_totals(cache),
+            cache.get(f'{METRICS_TAG}:processes', default={}, retry=True),
+            gauges()
+        )
+        return Response(text, mimetype='text/plain; version=0.0.4')
+
+    server.add_url_rule(path, 'metrics', serve_metrics)
@@ -1,45 +1,75 @@
+import re
+from collections import Counter
+from functools import lru_cache
+import numpy as np
 import pandas as pd
-import nltk
-from nltk.corpus import stopwords
 # nltk.download('punkt')
 # nltk.download('stopwords')
 
-STOP_WORDS = set(stopwords.words('english'))
+# english stopwords
+@lru_cache(maxsize=None)
+def stop_words():
+    from nltk.corpus import stopwords
+    return frozenset(stopwords.words('english'))
 
-def nltk_count_words(input_text:str, input_name:str, n_freq=10, text_magnify=100):
+# characters word_tokenize always splits off, commas and colons unless a digit follows
+SPLIT_PATTERN = re.compile(r'[;@#$%&?!*"`()\[\]{}<>«»“”‘’„]|[:,](?!\d)|\.{2,}|--')
 
-    # convert to lower and remove the name
-    input_text = input_text.lower().replace(input_name.lower(), '')
+# an alphabetic token between spaces, less the contraction and trailing periods word_tokenize splits off
+WORD_PATTERN = re.compile(r"(?<!\S)([^\W\d_]+)(?:n't|'ll|'re|'ve|'[smd]|')?\.*(?!\S)")
+
+# words word_tokenize splits in two wherever they stand between word boundaries, wanna only before a space
+# or what the tokenizer splits off, like the contractions of the treebank tokenizer
+SPLIT_WORDS = {
+    'cannot' : ('can', 'not'),
+    'gimme' : ('gim', 'me'),
+    'gonna' : ('gon', 'na'),
+    'gotta' : ('got', 'ta'),
+    'lemme' : ('lem', 'me'),
+    'wanna' : ('wan', 'na'),
+}
+SPLIT_WORDS_PATTERN = re.compile(r"\b(?:cannot|gimme|gonna|gotta|lemme)\b|\bwanna(?=\s|\.|'|$)")
 
-    # get tokens
+# alphabetic words of lower case text as nltk tokenizes them
+def nltk_words(input_text: str):
+    import nltk
+    STOP_WORDS = stop_words()
     tokens = [word for sent in nltk.sent_tokenize(input_text) for word in nltk.word_tokenize(sent)]
+    return [word for word in tokens if word.isalpha() and word not in STOP_WORDS]
+
+# the same words from two precompiled regular expressions, without sentence splitting
+# abbreviations nltk keeps together with their period, such as etc., are counted as words here
+def regex_words(input_text: str):
+    STOP_WORDS = stop_words()
+    text = SPLIT_WORDS_PATTERN.sub(lambda match : ' {} {} '.format(*SPLIT_WORDS[match.group()]), SPLIT_PATTERN.sub(' ', input_text))
+    return [word for word in WORD_PATTERN.findall(text) if word not in STOP_WORDS]
+
+TOKENIZERS = {
+    'regex' : regex_words,
+    'nltk' : nltk_words,
+}
+
+def nltk_count_words(input_text:str, input_name:str, n_freq=10, text_magnify=100, tokenizer='regex'):
+
+    # convert to lower and remove the name
+    input_text = input_text.lower().replace(input_name.lower(), '')
 
     # get only words from tokens
-    words = [word for word in tokens if word.isalpha() and word not in STOP_WORDS]
+    words = TOKENIZERS[tokenizer](input_text)
 
     # count the frequencies and return as dataframe        
-    fq = nltk.FreqDist(words)
+    fq = Counter(words)
+
+    # get the text size for frequency, clipped to upper and lower bounds
+    top = fq.most_common(n_freq)
+    word = np.array([word for word, _ in top], dtype=object)
+    frequency = np.array([count for _, count in top], dtype='float64')
+    if len(top) > 0:
+        frequency = np.round(frequency / frequency.sum() * text_magnify)
+    text_size = frequency.astype('int8').clip(12, 36)
 
     # construct the dataframe
-    df = (
-        pd.DataFrame(
-            fq.most_common(n_freq), columns=['word', 'frequency']
-        )
-    )
-    # get the text size for frequency
-    df = (
-        df
-        .assign(text_size=(df['frequency'] / df.head(n_freq)['frequency'].sum()) * text_magnify).round(decimals=0)
-        .drop(columns='frequency')
-        .astype(
-            {'text_size' : 'int8' }
-        )
-    )
-    # clip upper and lower bounds
-    df = (
-        df
-        .assign(text_size = df['text_size'].clip(upper=36, lower=12))
-    )
+    df = pd.DataFrame({'word' : word, 'text_size' : text_size})
     return df
 
 # print(nltk_count_words(TEST_TEXT, 'Igor', text_magnify=120))
\ No newline at end of file
@@ -1,6 +1,8 @@
-import plotly.express as px
+import json
 import plotly
 import plotly.graph_objs as go
+import pandas as pd
+from functools import lru_cache
 from random import choices
 
 # color themes
@@ -8,8 +10,15 @@ COLOR_1 = '#800080'
 COLOR_2 = '#66B3BA'
 COLOR_3 = '#DC156B'
 
-# comparison radar chart
-def radar_comparison(df, value: str, variable: str, group_col, groups: str):
+# radar figures kept per template and trace data, the same selections render the same figure
+FIGURE_CACHE_SIZE = 256
+
+# stands in for the consultant names in the comparison template
+GROUP_PLACEHOLDER = '__group__'
+
+# comparison radar chart built by plotly express
+def build_radar_comparison(df, value: str, variable: str, group_col, groups: str):
+    import plotly.express as px
     group_color_map = {
         groups[0] : COLOR_1,
         groups[1] : COLOR_2
@@ -56,8 +65,9 @@ def radar_comparison(df, value: str, variable: str, group_col, groups: str):
     )
     return fig
 
-# single radar chart
-def radar_single(df, value: str, variable: str, range_r: list, fill_color: str):
+# single radar chart built by plotly express
+def build_radar_single(df, value: str, variable: str, range_r: list, fill_color: str):
+    import plotly.express as px
     fig = px.line_polar(
         df, r=value, theta=variable, line_close=True, text=value, range_r=range_r, color_discrete_sequence=[fill_color]
     )
@@ -95,6 +105,64 @@ def radar_single(df, value: str, variable: str, range_r: list, fill_color: str):
 
     return fig
 
+# the figure of a one row frame as plain data, its trace is the template the data is swapped into
+# figures share the layout of their template, so they must not be modified in place
+@lru_cache(maxsize=None)
+def radar_single_template(value: str, variable: str, range_r: tuple, fill_color: str):
+    df = pd.DataFrame({value : [0], variable : ['']})
+    return json.loads(build_radar_single(df, value, variable, list(range_r), fill_color).to_json())
+
+@lru_cache(maxsize=None)
+def radar_comparison_template(value: str, variable: str, group_col: str):
+    df = pd.DataFrame({value : [0], variable : [''], group_col : [GROUP_PLACEHOLDER]})
+    return json.loads(build_radar_comparison(df, value, variable, group_col, [GROUP_PLACEHOLDER, '']).to_json())
+
+# repeat the first point to close the line, as line_close does
+close_line = lambda values : values + values[:1]
+
+@lru_cache(maxsize=FIGURE_CACHE_SIZE)
+def _radar_single(value: str, variable: str, range_r: tuple, fill_color: str, r: tuple, theta: tuple):
+    template = radar_single_template(value, variable, range_r, fill_color)
+    r, theta = close_line(list(r)), close_line(list(theta))
+    trace = dict(template['data'][0], r=r, theta=theta, text=r)
+    return {'data' : [trace], 'layout' : template['layout']}
+
+@lru_cache(maxsize=FIGURE_CACHE_SIZE)
+def _radar_comparison(value: str, variable: str, group_col: str, groups: tuple, rows: tuple):
+    template = radar_comparison_template(value, variable, group_col)
+    trace = template['data'][0]
+    group_color_map = {
+        groups[0] : COLOR_1,
+        groups[1] : COLOR_2
+    }
+
+    # one trace per consultant, in legend order and then in order of appearance
+    present = list(dict.fromkeys(group for group, _, _ in rows))
+    order = [group for group in dict.fromkeys(groups) if group in present] + [group for group in present if group not in groups]
+    data = []
+    for group in order:
+        r = close_line([rating for name, rating, _ in rows if name == group])
+        theta = close_line([technology for name, _, technology in rows if name == group])
+        data.append(dict(
+            trace,
+            hovertemplate=trace['hovertemplate'].replace(GROUP_PLACEHOLDER, str(group)),
+            legendgroup=group,
+            name=group,
+            line=dict(trace['line'], color=group_color_map.get(group, trace['line']['color'])),
+            r=r,
+            theta=theta
+        ))
+    return {'data' : data, 'layout' : template['layout']}
+
+# comparison radar chart
+def radar_comparison(df, value: str, variable: str, group_col, groups: str):
+    rows = tuple(zip(df[group_col].tolist(), df[value].tolist(), df[variable].tolist()))
+    return _radar_comparison(value, variable, group_col, tuple(groups), rows)
+
+# single radar chart
+def radar_single(df, value: str, variable: str, range_r: list, fill_color: str):
+    return _radar_single(value, variable, tuple(range_r), fill_color, tuple(df[value].tolist()), tuple(df[variable].tolist()))
+
 # word cloud
 def word_cloud(df):
     space_multiplier = 10
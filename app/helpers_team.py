@@ -0,0 +1,80 @@
+from functools import reduce
+from operator import or_
+from time import perf_counter
+
+# number of set bits
+popcount = lambda x : bin(x).count('1')
+
+# drop candidates whose coverage is a subset of another candidate's, they are never needed in a smallest team
+# only the window largest candidates are checked against, so this stays linear on large matrices
+def drop_dominated(bitsets: list, window=64):
+    kept = []
+    for bits in sorted(set(bitsets), key=lambda bits : (popcount(bits), bits), reverse=True):
+        if not any(bits | other == other for other in kept[:window]):
+            kept.append(bits)
+    return kept
+
+# greedy cover, the upper bound for the search
+def greedy_cover(bitsets: list, target: int):
+    team, uncovered = [], target
+    while uncovered:
+        best = max(bitsets, key=lambda bits : popcount(bits & uncovered))
+        team.append(best)
+        uncovered &= ~best
+    return team
+
+# smallest sets of bitsets covering target, branch and bound seeded by the greedy cover
+# bits no candidate has are left out, returns up to max_teams teams of the smallest size found
+# and whether that size is proven optimal within the time budget in seconds
+def min_cover(bitsets: list, target: int, time_budget=0.5, max_teams=5):
+    deadline = perf_counter() + time_budget
+    bitsets = drop_dominated([bits & target for bits in bitsets if bits & target])
+    target &= reduce(or_, bitsets, 0)
+    if target == 0:
+        return [[]], True
+
+    best = greedy_cover(bitsets, target)
+    teams = {frozenset(best)}
+    best_size = len(best)
+    max_cover = popcount(bitsets[0])
+    timed_out = False
+
+    # candidates covering each bit of the target, largest coverage first
+    covering = {}
+    for i in range(target.bit_length()):
+        bit = 1 << i
+        if target & bit:
+            covering[bit] = [bits for bits in bitsets if bits & bit]
+
+    def search(team: list, uncovered: int):
+        nonlocal best_size, teams, timed_out
+        if timed_out or perf_counter() > deadline:
+            timed_out = True
+            return
+        if uncovered == 0:
+            if len(team) < best_size:
+                best_size, teams = len(team), set()
+            if len(teams) < max_teams:
+                teams.add(frozenset(team))
+            return
+
+        # lower bound, each further member covers at most max_cover bits
+        remaining = popcount(uncovered)
+        if len(team) + -(-remaining // max_cover) > best_size:
+            return
+
+        # branch on the uncovered bit with the fewest candidates
+        bit = min(
+            (b for b in covering if uncovered & b),
+            key=lambda b : len(covering[b])
+        )
+        for bits in covering[bit]:
+            if bits not in team:
+                search(team + [bits], uncovered & ~bits)
+
+    search([], target)
+    teams = sorted(
+        (sorted(team, key=popcount, reverse=True) for team in teams if len(team) == best_size),
+        key=lambda team : [-popcount(bits) for bits in team]
+    )
+    return teams, not timed_out
@@ -0,0 +1,89 @@
+import re
+import unicodedata
+from bisect import bisect_left
+from collections import Counter
+from heapq import nsmallest
+
+TYPEAHEAD_LIMIT = 20 # options sent to a dropdown per search
+FUZZY_MIN_SHARE = 0.4 # share of the query's trigrams a fuzzy match must have
+FUZZY_MIN_LENGTH = 3 # shorter queries only match by prefix
+
+TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+
+# lower case without accents, so expose finds exposé
+def normalize(text: str):
+    text = unicodedata.normalize('NFKD', str(text))
+    return ''.join(c for c in text if not unicodedata.combining(c)).casefold().strip()
+
+# letter triples of the text, padded so the start and end of words count
+def trigrams(text: str):
+    padded = f'  {text} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+# search index over the options of a dropdown, built once per matrix
+# matches rank by: the option starts with the query, every query word starts a word of the option,
+# the option contains the query, and last options sharing most of the query's trigrams, for typos
+class TypeaheadIndex:
+
+    def __init__(self, values: list):
+        self.values = list(values)
+        self.keys = [normalize(value) for value in self.values]
+
+        # sorted (word, position) pairs, the words starting with a prefix are one range
+        self.words = sorted((word, i) for i, key in enumerate(self.keys) for word in set(TOKEN_PATTERN.findall(key)))
+        self.word_keys = [word for word, _ in self.words]
+
+        # positions of the options holding each trigram
+        self.grams = {}
+        for i, key in enumerate(self.keys):
+            for gram in trigrams(key):
+                self.grams.setdefault(gram, []).append(i)
+
+    # options with a word starting with the prefix
+    def prefixed(self, prefix: str):
+        start = bisect_left(self.word_keys, prefix)
+        end = bisect_left(self.word_keys, prefix + '￿', lo=start)
+        return {i for _, i in self.words[start:end]}
+
+    # the first options in their own order, for an empty search
+    def first(self, limit=TYPEAHEAD_LIMIT):
+        return self.values[:limit]
+
+    def search(self, query: str, limit=TYPEAHEAD_LIMIT):
+        query = normalize(query)
+        words = TOKEN_PATTERN.findall(query)
+        if len(words) == 0:
+            return self.first(limit)
+
+        # (tier, -share) of every match, lower is better
+        ranked = {
+            i : (0 if self.keys[i].startswith(query) else 1, 0)
+            for i in set.intersection(*(self.prefixed(word) for word in words))
+        }
+        # contained and fuzzy matches only fill in when the word matches are too few
+        if len(ranked) < limit and len(query) >= FUZZY_MIN_LENGTH:
+            query_grams = trigrams(query)
+            shared = Counter(i for gram in query_grams for i in self.grams.get(gram, ()))
+            for i, count in shared.items():
+                if i in ranked:
+                    continue
+                if query in self.keys[i]:
+                    ranked[i] = (2, 0)
+                elif count / len(query_grams) >= FUZZY_MIN_SHARE:
+                    ranked[i] = (3, -count / len(query_grams))
+
+        best = nsmallest(limit, ranked, key=lambda i : (ranked[i], len(self.keys[i]), self.keys[i]))
+        return [self.values[i] for i in best]
+
+# options of a dropdown, the selected values first so they stay shown
+# the query is added to the search text of every match, or the dropdown's own filter would hide the fuzzy ones
+def dropdown_options(matches: list, selected=None, query=None):
+    selected = selected if isinstance(selected, list) else [] if selected is None else [selected]
+    options = [{'label' : value, 'value' : value} for value in selected]
+    for value in matches:
+        if value not in selected:
+            option = {'label' : value, 'value' : value}
+            if query:
+                option['search'] = f'{value} {query}'
+            options.append(option)
+    return options
@@ -0,0 +1,101 @@
+import argparse
+import hashlib
+import json
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from helpers_cache import open_caches
+from helpers_dataset import load_skills_matrix
+from helpers_gpt import (
+    generate_prompt_from_data, generate_profile_summary,
+    summary_key, SharedTokenBucket, SUMMARY_TAG, GPT_BURST
+)
+
+# pre-generate the profile summaries into the summary cache the app reads from
+#   python summaries_batch.py --models gpt-3.5-turbo gpt-4 --words 200 300 --concurrency 4 --rate 2
+# by default only summaries missing from the cache are generated, which covers new consultants and
+# changed skills. --refresh regenerates all of them. Finished summaries are written to the cache as
+# they arrive, so a crashed run is resumed by running the same command again.
+# requests are paced by the token bucket the app uses in the same cache, so the batch and the live
+# workers together stay within --rate, which should match the app's GPT_RATE.
+
+logger = logging.getLogger('summaries_batch')
+
+DATA_PATH = 'data/Expose_Skills_Matrix_Master_Current.xlsx'
+CACHE_DIR = './cache'
+
+# progress of a --refresh run, kept in the cache until the run completes
+def journal_key(version: str, models: list, words: list):
+    payload = json.dumps([version, sorted(models), sorted(words)])
+    return '{}:batch:{}'.format(SUMMARY_TAG, hashlib.sha1(payload.encode()).hexdigest())
+
+# the journal and the token bucket are kept in cache, the summaries in results, cache by default
+def run_batch(matrix, cache, models: list, words: list, consultants=None, concurrency=4, rate=1.0, refresh=False, results=None):
+    results = cache if results is None else results
+    consultants = consultants or matrix.options('consultant_name')
+    jobs = [(name, n_words, model) for name in consultants for n_words in words for model in models]
+
+    # resume a refresh from its journal, otherwise skip what is already cached
+    journal = journal_key(matrix.version, models, words)
+    done = cache.get(journal, default=set(), retry=True) if refresh else set()
+    pending = []
+    for job in jobs:
+        name, n_words, model = job
+        if refresh:
+            if job not in done:
+                pending.append(job)
+        elif summary_key(generate_prompt_from_data(matrix, name, n_words), model) not in results:
+            pending.append(job)
+
+    stats = {'jobs' : len(jobs), 'skipped' : len(jobs) - len(pending), 'generated' : 0, 'failed' : 0}
+    limiter = SharedTokenBucket(cache, rate, capacity=GPT_BURST)
+    lock = threading.Lock()
+    logger.info('%s summaries to generate, %s already done', len(pending), stats['skipped'])
+
+    def generate(job):
+        name, n_words, model = job
+        generate_profile_summary(matrix, name, n_words, model, cache=results, limiter=limiter, refresh=refresh)
+        if refresh:
+            with lock, cache.transact(retry=True):
+                done.add(job)
+                cache.set(journal, done, retry=True)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = {executor.submit(generate, job) : job for job in pending}
+        for future in as_completed(futures):
+            try:
+                future.result()
+                stats['generated'] += 1
+            except Exception:
+                stats['failed'] += 1
+                logger.exception('failed to generate the summary for %s', futures[future])
+
+    if refresh and stats['failed'] == 0:
+        cache.delete(journal, retry=True)
+    return stats
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Pre-generate GPT profile summaries into the summary cache.')
+    parser.add_argument('--data', default=DATA_PATH, help='skills matrix workbook')
+    parser.add_argument('--cache', default=CACHE_DIR, help='diskcache directory shared with the app')
+    parser.add_argument('--models', nargs='+', default=['gpt-3.5-turbo'])
+    parser.add_argument('--words', nargs='+', type=int, default=[200], help='verbosity values to generate')
+    parser.add_argument('--consultants', nargs='+', help='only these consultants, all by default')
+    parser.add_argument('--concurrency', type=int, default=4, help='requests in flight')
+    parser.add_argument('--rate', type=float, default=1.0, help='requests started per second, shared with the app')
+    parser.add_argument('--refresh', action='store_true', help='regenerate summaries that are already cached')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+    matrix = load_skills_matrix(args.data)
+    cache, results = open_caches(args.cache)
+    with cache, results:
+        stats = run_batch(
+            matrix, cache, args.models, args.words, consultants=args.consultants,
+            concurrency=args.concurrency, rate=args.rate, refresh=args.refresh, results=results
+        )
+    logger.info('done %s', stats)
+    return 1 if stats['failed'] > 0 else 0
+
+if __name__ == '__main__':
+    raise SystemExit(main())
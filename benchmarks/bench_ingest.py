@@ -0,0 +1,79 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+# time and peak memory of parsing a large synthetic workbook, pd.read_excel against the streaming reader
+#   python benchmarks/bench_ingest.py --technologies 30000 --consultants 50
+# each reader runs in its own process and the peak resident memory is read from /proc, so linux only
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app')
+sys.path.insert(0, APP_DIR)
+
+# high water mark of the resident memory, unlike ru_maxrss it is not inherited from the parent across exec
+def peak_mb():
+    with open('/proc/self/status') as f:
+        return next(int(line.split()[1]) for line in f if line.startswith('VmHWM')) / 1024
+
+# the pipeline read_skills_matrix used before streaming
+def read_with_pandas(path: str):
+    import pandas as pd
+    from helpers_data import df_renamer, df_dropper, df_persona_stream_cleaner
+    from helpers_matrix import build_skills_matrix
+    return (
+        pd.read_excel(path, sheet_name='Ratings')
+        .pipe(df_renamer)
+        .pipe(df_dropper)
+        .pipe(df_persona_stream_cleaner)
+        .pipe(build_skills_matrix)
+    )
+
+def read_streaming(path: str):
+    from helpers_dataset import read_skills_matrix
+    return read_skills_matrix(path)
+
+READERS = {'pd.read_excel' : read_with_pandas, 'streaming' : read_streaming}
+
+# run in the child process, prints its measurements as json
+def measure(reader: str, path: str):
+    import openpyxl, pandas, helpers_dataset, helpers_matrix
+    baseline = peak_mb()
+    start = time.perf_counter()
+    matrix = READERS[reader](path)
+    print(json.dumps({
+        'seconds' : time.perf_counter() - start,
+        'peak_mb' : peak_mb(),
+        'baseline_mb' : baseline,
+        'shape' : list(matrix.shape),
+    }))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Peak memory of parsing a large workbook.')
+    parser.add_argument('--technologies', type=int, default=30000, help='rows of the ratings sheet')
+    parser.add_argument('--consultants', type=int, default=50)
+    parser.add_argument('--workbook', help='workbook to read instead of a synthetic one')
+    parser.add_argument('--measure', nargs=2, metavar=('READER', 'PATH'), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    if args.measure:
+        return measure(*args.measure)
+
+    path = args.workbook
+    if path is None:
+        from synthetic_ratings import synthetic_ratings, write_workbook
+        path = os.path.join(tempfile.mkdtemp(), 'ratings.xlsx')
+        write_workbook(synthetic_ratings(args.consultants, args.technologies, 12), path)
+    print(f'{path}: {os.path.getsize(path) / 2**20:.1f} MB')
+
+    print(f'{"reader":<16}{"seconds":>10}{"peak MB":>10}{"over imports MB":>18}')
+    for reader in READERS:
+        result = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), '--measure', reader, path],
+            capture_output=True, text=True, check=True
+        )
+        row = json.loads(result.stdout.splitlines()[-1])
+        print(f'{reader:<16}{row["seconds"]:>10.2f}{row["peak_mb"]:>10.0f}{row["peak_mb"] - row["baseline_mb"]:>18.0f}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+import os
+import sys
+from timeit import repeat
+
+import pandas as pd
+
+# run against the app helpers and workbook
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app')
+sys.path.insert(0, APP_DIR)
+
+from helpers_data import (
+    df_renamer, df_dropper,
+    df_persona_stream_cleaner, df_melt_ratings,
+    persona_stream_bits,
+    df_persona_stream_encoder, df_filter_bits
+)
+
+SCALE = 50
+REPEAT = 5
+
+# the stream filter the app used before the bitmask, kept here as the reference
+common_elem = lambda x, y : any(i in x for i in y)
+
+def df_filter_multiple_apply(df, inputs: list, col: str):
+    if not isinstance(inputs, list) or len(inputs) == 0:
+        return df
+    df = (
+        df
+        .assign(_temp=df[col].apply(lambda x : 1 if common_elem(x, inputs) else 0))
+        .query('_temp == 1')
+        .drop(columns='_temp')
+    )
+    return df
+
+# load the workbook the same way app.py does
+df = (
+    pd.read_excel(os.path.join(APP_DIR, 'data/Expose_Skills_Matrix_Master_Current.xlsx'), sheet_name='Ratings')
+    .pipe(df_renamer)
+    .pipe(df_dropper)
+    .pipe(df_persona_stream_cleaner)
+    .pipe(df_melt_ratings)
+)
+streams = sorted(df['persona_stream'].explode().unique().tolist())
+
+# grow the matrix by cloning consultants
+df_large = pd.concat(
+    [df.assign(consultant_name=df['consultant_name'] + f' {i}') for i in range(SCALE)],
+    ignore_index=True
+)
+bits = persona_stream_bits(streams)
+df_large = df_large.pipe(df_persona_stream_encoder, bits)
+
+selections = {
+    'one stream' : streams[:1],
+    'three streams' : streams[:3],
+    'all streams' : streams,
+}
+
+print(f'{df_large.shape[0]:,} rows ({SCALE}x current size), best of {REPEAT}')
+for label, selected in selections.items():
+    expected = df_filter_multiple_apply(df_large, selected, 'persona_stream')
+    actual = df_filter_bits(df_large, selected, bits)
+    assert expected.index.equals(actual.index), label
+
+    t_apply = min(repeat(lambda : df_filter_multiple_apply(df_large, selected, 'persona_stream'), number=1, repeat=REPEAT))
+    t_bits = min(repeat(lambda : df_filter_bits(df_large, selected, bits), number=1, repeat=REPEAT))
+    print(f'{label:>15}: apply {t_apply * 1000:8.1f} ms | bitmask {t_bits * 1000:6.1f} ms | {t_apply / t_bits:5.0f}x')
@@ -0,0 +1,84 @@
+import os
+import sys
+from random import Random
+from timeit import repeat
+
+from plotly.io.json import to_json_plotly
+
+# run against the app helpers and workbook
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app')
+sys.path.insert(0, APP_DIR)
+
+from helpers_dataset import read_skills_matrix
+from helpers_filter import FilterSpec
+from helpers_plotly import (
+    build_radar_single, build_radar_comparison,
+    radar_single, radar_comparison,
+    _radar_single, _radar_comparison
+)
+
+REPEAT = 5
+CALLS = 50
+
+matrix = read_skills_matrix(os.path.join(APP_DIR, 'data/Expose_Skills_Matrix_Master_Current.xlsx'))
+names = matrix.options('consultant_name')
+streams = matrix.options_streams()
+random = Random(0)
+
+# inputs of the capability and profiles callbacks, as the tabs send them
+capability_frames = []
+for _ in range(CALLS):
+    spec = FilterSpec(streams=random.sample(streams, random.randint(0, 2)), min_rating=random.randint(0, 4), max_rating=5)
+    df = matrix.rating_counts(spec).sort_values(by='rating_counts', ascending=False).iloc[0:15]
+    capability_frames.append(df)
+comparison_frames = []
+for _ in range(CALLS):
+    pair = random.sample(names, 2)
+    df = matrix.top_n_skills(FilterSpec(consultants=pair), random.randint(5, 10))[['skill_rating', 'technology', 'consultant_name']]
+    comparison_frames.append((df, pair))
+
+def scale(df):
+    max_counts = df['rating_counts'].max() if df.shape[0] > 0 else 0
+    if max_counts > 25:
+        return [0, 55], '#800080'
+    if max_counts > 10:
+        return [0, 25], '#c080c0'
+    return [0, 10], '#e6cce6'
+
+# the capability callback used to render the figure twice, before and after picking the scale
+def capability_before(df):
+    build_radar_single(df, 'rating_counts', 'technology', range_r=[0, 10], fill_color='#e6cce6')
+    range_r, fill_color = scale(df)
+    return build_radar_single(df, 'rating_counts', 'technology', range_r=range_r, fill_color=fill_color)
+
+def capability_after(df):
+    range_r, fill_color = scale(df)
+    return radar_single(df, 'rating_counts', 'technology', range_r=range_r, fill_color=fill_color)
+
+comparison_before = lambda args : build_radar_comparison(args[0], 'skill_rating', 'technology', 'consultant_name', args[1])
+comparison_after = lambda args : radar_comparison(args[0], 'skill_rating', 'technology', 'consultant_name', args[1])
+
+# per callback, the figure and its json for the response
+def per_call_ms(render, inputs, clear=None):
+    def run():
+        for args in inputs:
+            if clear is not None:
+                clear()
+            to_json_plotly(render(args))
+    return min(repeat(run, number=1, repeat=REPEAT)) * 1000 / len(inputs)
+
+# build the templates once, as the first callback of a worker does
+capability_after(capability_frames[0])
+comparison_after(comparison_frames[0])
+
+print(f'{"callback":<14}{"px ms":>10}{"template ms":>14}{"cached ms":>12}')
+for name, before, after, inputs, cache in [
+    ('capability', capability_before, capability_after, capability_frames, _radar_single),
+    ('comparison', comparison_before, comparison_after, comparison_frames, _radar_comparison),
+]:
+    print(
+        f'{name:<14}'
+        f'{per_call_ms(before, inputs):>10.2f}'
+        f'{per_call_ms(after, inputs, cache.cache_clear):>14.2f}'
+        f'{per_call_ms(after, inputs):>12.2f}'
+    )
@@ -0,0 +1,149 @@
+import argparse
+import json
+import os
+import platform
+import sys
+from datetime import datetime, timezone
+from timeit import repeat
+
+# how the data helpers and callback bodies scale with the number of consultants, on synthetic workbooks
+#   python benchmarks/bench_scaling.py
+#   python benchmarks/bench_scaling.py --sizes 100 1000 --output /tmp/after.json --compare benchmarks/results/scaling.json
+# results are written as json, a later run compared against them prints the ratio per case and size
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app')
+RESULTS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results', 'scaling.json')
+sys.path.insert(0, APP_DIR)
+
+from helpers_data import (
+    df_renamer, df_dropper,
+    df_persona_stream_cleaner, df_melt_ratings,
+    df_filter_multiple, df_filter_multiple_simple,
+    df_persona_stream_encoder, persona_stream_bits,
+    df_filter_bits, df_top_n_skills
+)
+from helpers_filter import FilterSpec
+from helpers_matrix import build_skills_matrix
+from helpers_plotly import radar_single, radar_comparison, _radar_single, _radar_comparison
+from synthetic_ratings import synthetic_ratings
+
+SIZES = [100, 300, 1000, 3000, 10000]
+
+# the same steps as the callbacks of app.py, without the memoized results and with the figures built each time
+def capability_body(matrix, streams):
+    df = matrix.rating_counts(FilterSpec(streams=streams[:2], min_rating=3, max_rating=5)).sort_values(by='rating_counts', ascending=False).iloc[0:15]
+    _radar_single.cache_clear()
+    return radar_single(df, 'rating_counts', 'technology', range_r=[0, 55], fill_color='#800080')
+
+def comparison_body(matrix, names):
+    df = matrix.top_n_skills(FilterSpec(consultants=names[:2]), 10)[['skill_rating', 'technology', 'consultant_name']]
+    _radar_comparison.cache_clear()
+    return radar_comparison(df, 'skill_rating', 'technology', 'consultant_name', names[:2])
+
+# (case, group, function of the size's inputs) in report order
+CASES = [
+    ('clean sheet', 'pipeline', lambda s : s['raw'].pipe(df_renamer).pipe(df_dropper).pipe(df_persona_stream_cleaner)),
+    ('df_melt_ratings', 'pipeline', lambda s : df_melt_ratings(s['clean'])),
+    ('build_skills_matrix', 'pipeline', lambda s : build_skills_matrix(s['clean'])),
+    ('df_filter_multiple', 'helpers', lambda s : df_filter_multiple(s['melted'], s['streams'][:3], 'persona_stream')),
+    ('df_filter_multiple_simple', 'helpers', lambda s : df_filter_multiple_simple(s['melted'], s['technologies'][:10], 'technology')),
+    ('df_filter_bits', 'helpers', lambda s : df_filter_bits(s['melted'], s['streams'][:3], s['bits'])),
+    ('df_top_n_skills', 'helpers', lambda s : df_top_n_skills(s['melted'], s['names'][:2], 10)),
+    ('capability graph', 'callbacks', lambda s : capability_body(s['matrix'], s['streams'])),
+    ('comparison graph', 'callbacks', lambda s : comparison_body(s['matrix'], s['names'])),
+    ('similar consultants', 'callbacks', lambda s : s['matrix'].similar_consultants(s['names'][0], 10, FilterSpec())),
+    ('search page', 'callbacks', lambda s : s['matrix'].search_page(FilterSpec(technologies=s['technologies'][:5], min_rating=3, max_rating=5), 'skill_rating', True, 0, 25)),
+    ('team builder', 'callbacks', lambda s : s['matrix'].build_team(s['technologies'][:8], 4, time_budget=0.5)),
+]
+
+# the inputs of every case at one size
+def inputs(consultants: int, technologies: int, streams: int, seed: int):
+    raw = synthetic_ratings(consultants, technologies, streams, seed)
+    clean = raw.pipe(df_renamer).pipe(df_dropper).pipe(df_persona_stream_cleaner)
+    matrix = build_skills_matrix(clean)
+    bits = persona_stream_bits(matrix.streams)
+    return {
+        'raw' : raw,
+        'clean' : clean,
+        'melted' : df_melt_ratings(clean).pipe(df_persona_stream_encoder, bits),
+        'matrix' : matrix,
+        'bits' : bits,
+        'streams' : matrix.streams,
+        'names' : matrix.options('consultant_name'),
+        'technologies' : matrix.options('technology'),
+    }
+
+# best of the repeats in milliseconds
+def best_ms(f, size_inputs, repeats: int):
+    return min(repeat(lambda : f(size_inputs), number=1, repeat=repeats)) * 1000
+
+def run(sizes: list, technologies: int, streams: int, seed: int, repeats: int):
+    results = {case : {} for case, _, _ in CASES}
+    for size in sizes:
+        size_inputs = inputs(size, technologies, streams, seed)
+        for case, _, f in CASES:
+            results[case][str(size)] = best_ms(f, size_inputs, repeats)
+        print(f'{size} consultants done', file=sys.stderr)
+    return {
+        'created' : datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python' : platform.python_version(),
+        'machine' : platform.machine(),
+        'technologies' : technologies,
+        'streams' : streams,
+        'seed' : seed,
+        'repeats' : repeats,
+        'sizes' : sizes,
+        'results_ms' : results,
+    }
+
+# one row per case, one column per size, in ms or as the ratio to a previous run
+def table(report: dict, previous=None):
+    sizes = [str(size) for size in report['sizes']]
+    unit = 'x previous' if previous else 'ms'
+    lines = [
+        f'{report["technologies"]} technologies, {report["streams"]} streams, best of {report["repeats"]}, {unit}',
+        f'{"case":<28}' + ''.join(f'{size:>10}' for size in sizes),
+    ]
+    group = None
+    for case, case_group, _ in CASES:
+        if case_group != group:
+            group = case_group
+            lines.append(f'[{group}]')
+        cells = []
+        for size in sizes:
+            ms = report['results_ms'][case][size]
+            if previous is None:
+                cells.append(f'{ms:>10.2f}')
+            else:
+                before = previous['results_ms'].get(case, {}).get(size)
+                cells.append(f'{ms / before:>9.2f}x' if before else f'{"-":>10}')
+        lines.append(f'{case:<28}' + ''.join(cells))
+    return '\n'.join(lines) + '\n'
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Scaling benchmark of the data helpers and callbacks.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES, help='consultant counts')
+    parser.add_argument('--technologies', type=int, default=160)
+    parser.add_argument('--streams', type=int, default=12)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeats', type=int, default=3, help='runs per case, the fastest is reported')
+    parser.add_argument('--output', default=RESULTS_PATH, help='json results file')
+    parser.add_argument('--compare', help='json results of a previous run')
+    args = parser.parse_args(argv)
+
+    previous = None
+    if args.compare:
+        with open(args.compare) as f:
+            previous = json.load(f)
+
+    report = run(args.sizes, args.technologies, args.streams, args.seed, args.repeats)
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(table(report), end='')
+
+    if previous is not None:
+        print(f'\ncompared with {args.compare} ({previous["created"]})')
+        print(table(report, previous), end='')
+
+if __name__ == '__main__':
+    main()
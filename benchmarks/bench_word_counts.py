@@ -0,0 +1,82 @@
+import os
+import sys
+from timeit import repeat
+
+# run against the app helpers, the nltk path needs the punkt and stopwords data
+#   python -c "import nltk; nltk.download('punkt'); nltk.download('stopwords')"
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app')
+sys.path.insert(0, APP_DIR)
+
+from helpers_nltk import nltk_count_words
+
+REPEAT = 5
+BATCH = 200
+
+# reference corpus, profile summaries in the style the app gets back from the model
+NAMES = ['Alex Citizen', 'Sam Nguyen', 'Jordan Smith', 'Priya Patel']
+SUMMARIES = [
+    "Alex Citizen is a versatile data and analytics consultant who designs reliable data platforms, "
+    "builds pipelines and reporting solutions, and works closely with stakeholders to turn business "
+    "questions into practical outcomes.\n\nKnown for a pragmatic approach, clear communication and a "
+    "focus on delivering value early, Alex brings experience across cloud platforms, modelling and visualisation.",
+
+    "Sam Nguyen is a hands-on engineer with a strong track record of modernising legacy reporting. "
+    "Sam's clients value the way complex problems are broken down into small, testable steps; "
+    "colleagues describe Sam as calm under pressure (even on tight timeframes) and generous with knowledge.\n\n"
+    "Sam doesn't over-engineer: solutions are fit for purpose, well documented and easy to hand over...",
+
+    "Jordan Smith helps organisations get more from their data. Jordan's strengths include: stakeholder "
+    "engagement, requirements gathering and translating \"nice to have\" ideas into delivery plans. "
+    "With 10+ years in consulting, Jordan has led teams of 3-8 people, mentored graduates and "
+    "presented to executives, e.g. steering committees and boards.\n\nJordan is curious, collaborative "
+    "and committed to high-quality, maintainable work -- always with the end user in mind!",
+
+    "Priya Patel is a senior consultant who specialises in analytics engineering and governance. "
+    "Priya’s work spans data quality, lineage and access control, and she’s often the person teams "
+    "call when “it works on my machine” isn’t good enough. Priya enjoys coaching, running workshops "
+    "and building communities of practice.\n\nClients appreciate Priya's attention to detail, her "
+    "structured approach and her ability to explain technical trade-offs in plain English, etc.",
+
+    "A data consultant with broad experience across government, financial services and retail. "
+    "They design and deliver end-to-end solutions: ingestion, transformation, modelling and "
+    "reporting. They're comfortable leading delivery or working as part of a larger team, and "
+    "they've built a reputation for dependable estimates, honest advice and strong relationships. "
+    "Outside of delivery they contribute to internal capability uplift (training, templates and "
+    "reusable accelerators) and enjoy sharing lessons learnt at meet-ups.",
+
+    # contractions word_tokenize splits in two
+    "Sam Nguyen cannot resist a hard problem and is gonna find the root cause, whatever it takes. "
+    "Teams who wanna move faster ask Sam to pair with them: \"gimme the gnarly bits\" and \"lemme see\". "
+    "Cannot is not a word Sam uses lightly; delivery has gotta be sustainable, and Sam's gonna-do "
+    "lists are short. Wanna know more? Sam said it best: \"we cannot, we gotta, we wanna\".",
+]
+
+# the same text grown to a long summary
+LONG_SUMMARY = ' '.join(SUMMARIES * 4)
+
+def word_counts(text: str, name: str, tokenizer: str, n_freq=30):
+    df = nltk_count_words(text, name, n_freq=n_freq, text_magnify=120, tokenizer=tokenizer)
+    return list(zip(df['word'], df['text_size']))
+
+# both paths give the same top n on every summary of the corpus
+mismatches = [
+    (i, n_freq)
+    for i, text in enumerate(SUMMARIES + [LONG_SUMMARY])
+    for n_freq in [5, 10, 30]
+    if word_counts(text, NAMES[i % len(NAMES)], 'nltk', n_freq) != word_counts(text, NAMES[i % len(NAMES)], 'regex', n_freq)
+]
+print(f'{len(SUMMARIES) + 1} summaries compared, {len(mismatches)} mismatches {mismatches}')
+
+cases = {
+    'one summary' : lambda tokenizer : word_counts(SUMMARIES[0], NAMES[0], tokenizer),
+    f'long summary ({len(LONG_SUMMARY.split())} words)' : lambda tokenizer : word_counts(LONG_SUMMARY, NAMES[0], tokenizer),
+    f'batch of {BATCH} summaries' : lambda tokenizer : [
+        word_counts(SUMMARIES[i % len(SUMMARIES)], NAMES[i % len(NAMES)], tokenizer) for i in range(BATCH)
+    ],
+}
+
+print(f'{"case":<28}{"nltk ms":>10}{"regex ms":>10}{"speed-up":>10}')
+for case, f in cases.items():
+    nltk_ms = min(repeat(lambda : f('nltk'), number=1, repeat=REPEAT)) * 1000
+    regex_ms = min(repeat(lambda : f('regex'), number=1, repeat=REPEAT)) * 1000
+    print(f'{case:<28}{nltk_ms:>10.2f}{regex_ms:>10.2f}{nltk_ms / regex_ms:>9.1f}x')
@@ -0,0 +1,79 @@
+import argparse
+import os
+import re
+import subprocess
+import sys
+
+# import-time profile of app.py from python -X importtime, written as a report
+#   python benchmarks/import_time.py --budget 1500
+# exits with 1 when a module app.py leaves to first use is imported at start-up, or when the
+# import takes longer than the budget, so the start-up time can not grow unnoticed
+
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app')
+REPORT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results', 'import_time.txt')
+
+# imported on first use or by the warm-up after the fork, see app.warm_up
+LAZY_MODULES = ['openai', 'tenacity', 'nltk', 'plotly.express']
+
+LINE_PATTERN = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+
+# (module, self us, cumulative us, depth) of every import, in the order they finish
+def profile_imports(module='app'):
+    env = dict(os.environ)
+    env.setdefault('USER', 'user')
+    env.setdefault('PASSWORD', 'password')
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=APP_DIR, env=env, capture_output=True, text=True, check=True
+    )
+    imports = []
+    for line in result.stderr.splitlines():
+        match = LINE_PATTERN.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            imports.append((name, int(self_us), int(cumulative_us), (len(indent) - 1) // 2))
+    return imports
+
+def report(runs: int, top: int):
+    profiles = [profile_imports() for _ in range(runs)]
+    total = lambda imports : sum(cumulative for _, _, cumulative, depth in imports if depth == 0)
+    imports = min(profiles, key=total)
+    names = {name for name, _, _, _ in imports}
+    eager = [name for name in LAZY_MODULES if name in names]
+
+    lines = [
+        f'import app: {total(imports) / 1000:.0f} ms (fastest of {runs} runs)',
+        f'modules imported: {len(imports)}',
+        f'imported on first use: {", ".join(LAZY_MODULES)}',
+        f'imported at start-up by mistake: {", ".join(eager) if eager else "none"}',
+        '',
+        f'top {top} packages by cumulative time',
+        f'{"cumulative ms":>14}{"self ms":>10}  module',
+    ]
+    packages = [entry for entry in imports if '.' not in entry[0] and entry[3] <= 1]
+    for name, self_us, cumulative_us, _ in sorted(packages, key=lambda entry : -entry[2])[:top]:
+        lines.append(f'{cumulative_us / 1000:>14.1f}{self_us / 1000:>10.1f}  {name}')
+    lines += ['', f'top {top} modules by self time', f'{"self ms":>14}  module']
+    for name, self_us, _, _ in sorted(imports, key=lambda entry : -entry[1])[:top]:
+        lines.append(f'{self_us / 1000:>14.1f}  {name}')
+    return '\n'.join(lines) + '\n', total(imports) / 1000, eager
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Import-time profile of app.py.')
+    parser.add_argument('--runs', type=int, default=3, help='profiles taken, the fastest is reported')
+    parser.add_argument('--top', type=int, default=25, help='modules listed per table')
+    parser.add_argument('--budget', type=float, help='fail above this many milliseconds')
+    parser.add_argument('--output', default=REPORT_PATH, help='report file')
+    args = parser.parse_args(argv)
+
+    text, total_ms, eager = report(args.runs, args.top)
+    os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    with open(args.output, 'w') as f:
+        f.write(text)
+    print(text, end='')
+
+    failed = len(eager) > 0 or (args.budget is not None and total_ms > args.budget)
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,364 @@
+import argparse
+import base64
+import http.client
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from time import perf_counter
+from urllib.parse import urlencode, urlsplit
+
+import numpy as np
+
+# end-to-end load test, simulated users replay the callback requests the browser sends for each tab
+#   python benchmarks/load_test.py --workers 1 2 4 --users 1 8 32 --duration 30
+#   python benchmarks/load_test.py --url http://127.0.0.1:8050 --users 16
+# without --url, gunicorn is started on app.py for each worker count and summaries go to a local stub of OpenAI
+# actions are recorded from the layout and callbacks of the running app, --save-payloads writes them as json lines
+# and --payloads replays a saved or hand-made file, each line {"tab", "action", "steps" : [{"callback", "body"}]}
+# latency percentiles and throughput per callback are printed per level and written to benchmarks/results/load_test.json
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app')
+RESULTS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results', 'load_test.json')
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from stub_openai import serve as serve_stub_openai
+
+UPDATE_PATH = '/_dash-update-component'
+READY_TIMEOUT = 120 # seconds to wait for gunicorn to load the app
+REQUEST_TIMEOUT = 120
+
+# keep-alive connection of one simulated user
+class Client:
+
+    def __init__(self, url: str, user: str, password: str):
+        parts = urlsplit(url)
+        self.host, self.port = parts.hostname, parts.port or 80
+        self.headers = {
+            'Authorization' : 'Basic ' + base64.b64encode(f'{user}:{password}'.encode()).decode(),
+            'Content-Type' : 'application/json',
+        }
+        self.connection = None
+
+    def request(self, method: str, path: str, body=None):
+        for attempt in range(2):
+            if self.connection is None:
+                self.connection = http.client.HTTPConnection(self.host, self.port, timeout=REQUEST_TIMEOUT)
+            try:
+                self.connection.request(method, path, body=None if body is None else json.dumps(body), headers=self.headers)
+                response = self.connection.getresponse()
+                return response.status, response.read()
+            except (http.client.HTTPException, ConnectionError):
+                self.connection.close()
+                self.connection = None
+                if attempt == 1:
+                    raise
+
+    def get_json(self, path: str):
+        status, data = self.request('GET', path)
+        if status != 200:
+            raise RuntimeError(f'GET {path} answered {status}')
+        return json.loads(data)
+
+# post a callback, background callbacks are polled like the browser does until they return
+def post_callback(client: Client, step: dict):
+    status, data = client.request('POST', UPDATE_PATH, step['body'])
+    if status != 200 or 'poll' not in step:
+        return status
+    job = json.loads(data)
+    query = urlencode({'cacheKey' : job['cacheKey'], 'job' : job['job']})
+    while True:
+        time.sleep(step['poll'])
+        status, data = client.request('POST', f'{UPDATE_PATH}?{query}', step['body'])
+        if status != 200 or 'response' in json.loads(data):
+            return status
+
+# component props of the layout, by id
+def layout_props(node, props=None):
+    props = {} if props is None else props
+    if isinstance(node, dict):
+        if isinstance(node.get('props'), dict) and 'id' in node['props']:
+            props[node['props']['id']] = node['props']
+        for value in node.values():
+            layout_props(value, props)
+    elif isinstance(node, list):
+        for value in node:
+            layout_props(value, props)
+    return props
+
+def option_values(props: dict):
+    return [option['value'] if isinstance(option, dict) else option for option in props.get('options', [])]
+
+# outputs of a dependency, several are written ..a.children...b.style..
+def output_spec(output: str):
+    specs = [dict(zip(['id', 'property'], spec.rsplit('.', 1))) for spec in output.strip('.').split('...')]
+    return specs if output.startswith('..') else specs[0]
+
+# the browser's request for a callback with the current values, after a change of one prop
+def callback_body(dependency: dict, values: dict, changed: str):
+    with_value = lambda items : [dict(item, value=values.get(f'{item["id"]}.{item["property"]}')) for item in items]
+    return {
+        'output' : dependency['output'],
+        'outputs' : output_spec(dependency['output']),
+        'inputs' : with_value(dependency['inputs']),
+        'changedPropIds' : [changed],
+        'state' : with_value(dependency['state']),
+    }
+
+# replayable actions of every tab, drawn with the weights of how often people do them
+class Recorder:
+
+    def __init__(self, dependencies: list, layout: dict, seed=0):
+        self.dependencies = dependencies
+        self.props = layout_props(layout)
+        self.random = random.Random(seed)
+        self.values = {
+            f'{id}.value' : props['value'] for id, props in self.props.items() if 'value' in props
+        }
+        self.values.update({
+            'search_table.page_current' : 0,
+            'search_table.page_size' : self.props['search_table'].get('page_size', 25),
+            'search_table.sort_by' : [],
+            'generate_summary.n_clicks' : 1,
+        })
+        self.options = {id : option_values(props) for id, props in self.props.items() if 'options' in props}
+
+    def dependency(self, output: str):
+        return next(dependency for dependency in self.dependencies if output in dependency['output'])
+
+    def step(self, output: str, values: dict, changed: str):
+        dependency = self.dependency(output)
+        step = {'callback' : output.split('.')[0], 'body' : callback_body(dependency, values, changed)}
+        if dependency.get('long'):
+            step['poll'] = dependency['long']['interval'] / 1000
+        return step
+
+    def sample(self, id: str, low: int, high: int):
+        return self.random.sample(self.options[id], self.random.randint(low, min(high, len(self.options[id]))))
+
+    # a new stream or category filter redraws the graph and resets the slider
+    def capability_filter(self):
+        values = dict(self.values, **{
+            'input_persona_stream_capability.value' : self.sample('input_persona_stream_capability', 0, 2),
+            'input_categories_capability.value' : self.sample('input_categories_capability', 0, 2),
+            'input_min_rating_capability.value' : [self.random.randint(1, 4), 5],
+            'input_capability_graph_slider.value' : [0, 15],
+        })
+        return [
+            self.step('input_capability_graph_slider.max', values, 'input_persona_stream_capability.value'),
+            self.step('capability_graph.figure', values, 'input_persona_stream_capability.value'),
+        ]
+
+    # dragging the slider end sends one request per step
+    def capability_slider(self):
+        start = self.random.randint(10, 20)
+        return [
+            self.step(
+                'capability_graph.figure',
+                dict(self.values, **{'input_capability_graph_slider.value' : [0, end]}),
+                'input_capability_graph_slider.value'
+            )
+            for end in range(start, start + self.random.randint(3, 8))
+        ]
+
+    def comparison(self):
+        values = dict(self.values, **{
+            'input_consultant_1.value' : self.random.choice(self.options['input_consultant_1']),
+            'input_consultant_2.value' : self.random.choice(self.options['input_consultant_2']),
+            'input_persona_stream.value' : self.sample('input_persona_stream', 0, 2),
+            'input_n_ratings.value' : self.random.randint(5, 10),
+        })
+        return [self.step('comparison_graph.figure', values, 'input_consultant_2.value')]
+
+    def similar(self):
+        values = dict(self.values, **{
+            'input_consultant_similar.value' : self.random.choice(self.options['input_consultant_similar']),
+            'input_n_similar.value' : self.random.choice([5, 10, 15, 20]),
+        })
+        return [self.step('similar_table.children', values, 'input_consultant_similar.value')]
+
+    # a query with the team builder on or off, then a few pages of results
+    def search(self):
+        values = dict(self.values, **{
+            'input_technology.value' : self.sample('input_technology', 1, 4),
+            'input_min_rating_search.value' : [self.random.randint(1, 4), 5],
+            'input_team_builder.value' : self.random.random() < 0.5,
+        })
+        steps = [
+            self.step('search_table.data', values, 'input_technology.value'),
+            self.step('search_team.children', values, 'input_technology.value'),
+        ]
+        for page in range(1, self.random.randint(1, 3)):
+            steps.append(self.step('search_table.data', dict(values, **{'search_table.page_current' : page}), 'search_table.page_current'))
+        return steps
+
+    def summary(self):
+        values = dict(self.values, **{
+            'input_profile_ai.value' : self.random.choice(self.options['input_profile_ai']),
+            'input_summary_words.value' : self.random.choice([100, 200, 300, 400, 500]),
+        })
+        return [self.step('gpt_response.children', values, 'generate_summary.n_clicks')]
+
+    def record(self, count: int):
+        actions = [
+            ('capabilities', 'filter', self.capability_filter, 3),
+            ('capabilities', 'slider drag', self.capability_slider, 2),
+            ('comparison', 'consultants', self.comparison, 3),
+            ('similar', 'consultant', self.similar, 2),
+            ('search', 'query and pages', self.search, 3),
+            ('profile ai summary', 'generate', self.summary, 1),
+        ]
+        picked = self.random.choices(actions, weights=[action[3] for action in actions], k=count)
+        return [{'tab' : tab, 'action' : action, 'steps' : record()} for tab, action, record, _ in picked]
+
+# one simulated user, replaying random actions with a pause in between until the level ends
+def simulate_user(client: Client, actions: list, stop_at: float, think: float, samples: list, seed: int):
+    user_random = random.Random(seed)
+    while perf_counter() < stop_at:
+        for step in user_random.choice(actions)['steps']:
+            start = perf_counter()
+            try:
+                status = post_callback(client, step)
+            except Exception:
+                status = 0
+            samples.append((step['callback'], perf_counter() - start, status))
+        if think > 0:
+            time.sleep(user_random.expovariate(1 / think))
+
+def run_level(url: str, auth: tuple, actions: list, users: int, duration: float, think: float):
+    samples = []
+    stop_at = perf_counter() + duration
+    threads = [
+        threading.Thread(target=simulate_user, args=(Client(url, *auth), actions, stop_at, think, samples, i), daemon=True)
+        for i in range(users)
+    ]
+    start = perf_counter()
+    [thread.start() for thread in threads]
+    [thread.join() for thread in threads]
+    return samples, perf_counter() - start
+
+# count, errors, latency percentiles in ms and throughput per callback and overall
+def summarize(samples: list, elapsed: float):
+    groups = {}
+    for callback, seconds, status in samples:
+        groups.setdefault(callback, []).append((seconds, status))
+    groups['all'] = [(seconds, status) for _, seconds, status in samples]
+    stats = {}
+    for callback, group in groups.items():
+        ms = np.array([seconds for seconds, _ in group]) * 1000
+        stats[callback] = {
+            'requests' : len(group),
+            'errors' : sum(1 for _, status in group if not 200 <= status < 300),
+            'p50_ms' : float(np.percentile(ms, 50)) if len(ms) else None,
+            'p95_ms' : float(np.percentile(ms, 95)) if len(ms) else None,
+            'p99_ms' : float(np.percentile(ms, 99)) if len(ms) else None,
+            'per_second' : len(group) / elapsed,
+        }
+    return stats
+
+def table(users: int, elapsed: float, stats: dict):
+    lines = [
+        f'{users} users, {elapsed:.0f} s',
+        f'{"callback":<30}{"requests":>10}{"errors":>8}{"p50 ms":>10}{"p95 ms":>10}{"p99 ms":>10}{"req/s":>8}',
+    ]
+    for callback, row in sorted(stats.items(), key=lambda item : (item[0] == 'all', item[0])):
+        lines.append(
+            f'{callback:<30}{row["requests"]:>10}{row["errors"]:>8}'
+            f'{row["p50_ms"]:>10.1f}{row["p95_ms"]:>10.1f}{row["p99_ms"]:>10.1f}{row["per_second"]:>8.1f}'
+        )
+    return '\n'.join(lines) + '\n'
+
+# gunicorn on app.py with its own config, the summaries go to the stub
+def start_server(workers: int, port: int, auth: tuple, stub_url: str, log_path: str):
+    env = dict(os.environ, USER=auth[0], PASSWORD=auth[1], OPENAI_API_BASE=stub_url, GPT_API_KEY='stub')
+    with open(log_path, 'a') as log:
+        return subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', '-w', str(workers), '-b', f'127.0.0.1:{port}', 'app:server'],
+            cwd=APP_DIR, env=env, stdout=log, stderr=subprocess.STDOUT
+        )
+
+def wait_ready(url: str, auth: tuple, process=None):
+    client = Client(url, *auth)
+    deadline = time.monotonic() + READY_TIMEOUT
+    while time.monotonic() < deadline:
+        if process is not None and process.poll() is not None:
+            raise RuntimeError('gunicorn exited, see the server log')
+        try:
+            if client.request('GET', '/_dash-layout')[0] == 200:
+                return
+        except (OSError, http.client.HTTPException):
+            pass
+        time.sleep(0.5)
+    raise RuntimeError(f'{url} not ready after {READY_TIMEOUT} s')
+
+# record or load the actions, warm the app up and run every level of users against it
+def load_test(url: str, auth: tuple, args):
+    wait_ready(url, auth)
+    if args.payloads:
+        with open(args.payloads) as f:
+            actions = [json.loads(line) for line in f if line.strip()]
+    else:
+        client = Client(url, *auth)
+        recorder = Recorder(client.get_json('/_dash-dependencies'), client.get_json('/_dash-layout'), args.seed)
+        actions = recorder.record(args.actions)
+    if args.save_payloads:
+        with open(args.save_payloads, 'w') as f:
+            f.writelines(json.dumps(action) + '\n' for action in actions)
+
+    # every kind of action once, so the levels do not pay for imports and first renders
+    warm_up = Client(url, *auth)
+    for kind in {(action['tab'], action['action']) : action for action in actions}.values():
+        [post_callback(warm_up, step) for step in kind['steps']]
+
+    levels = []
+    for users in args.users:
+        samples, elapsed = run_level(url, auth, actions, users, args.duration, args.think)
+        stats = summarize(samples, elapsed)
+        levels.append({'users' : users, 'seconds' : elapsed, 'callbacks' : stats})
+        print(table(users, elapsed, stats))
+    return levels
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Concurrent-user load test of the Dash app.')
+    parser.add_argument('--url', help='app already running, otherwise gunicorn is started')
+    parser.add_argument('--workers', type=int, nargs='+', default=[4], help='gunicorn workers when the app is started here, one run each')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--users', type=int, nargs='+', default=[1, 4, 16], help='concurrent users, one level each')
+    parser.add_argument('--duration', type=float, default=30, help='seconds per level')
+    parser.add_argument('--think', type=float, default=1.0, help='mean seconds between the actions of a user')
+    parser.add_argument('--actions', type=int, default=500, help='actions recorded')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--payloads', help='json lines of actions to replay instead of recording')
+    parser.add_argument('--save-payloads', help='write the recorded actions as json lines')
+    parser.add_argument('--stub-latency', type=float, default=0.5, help='seconds before the stub answers')
+    parser.add_argument('--stub-token-delay', type=float, default=0.02, help='seconds between streamed tokens of the stub')
+    parser.add_argument('--output', default=RESULTS_PATH, help='json results file')
+    parser.add_argument('--server-log', default=os.path.join(tempfile.gettempdir(), 'load_test_server.log'))
+    args = parser.parse_args(argv)
+    auth = (os.getenv('USER', 'load'), os.getenv('PASSWORD', 'test'))
+
+    runs = []
+    if args.url:
+        runs.append({'url' : args.url, 'workers' : None, 'levels' : load_test(args.url, auth, args)})
+    else:
+        stub, _ = serve_stub_openai(0, latency=args.stub_latency, token_delay=args.stub_token_delay)
+        url = f'http://127.0.0.1:{args.port}'
+        for workers in args.workers:
+            print(f'# {workers} gunicorn workers\n')
+            process = start_server(workers, args.port, auth, f'http://127.0.0.1:{stub.server_port}/v1', args.server_log)
+            try:
+                wait_ready(url, auth, process)
+                runs.append({'url' : None, 'workers' : workers, 'levels' : load_test(url, auth, args)})
+            finally:
+                process.terminate()
+                process.wait()
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump({'think_seconds' : args.think, 'duration_seconds' : args.duration, 'runs' : runs}, f, indent=2)
+
+if __name__ == '__main__':
+    main()
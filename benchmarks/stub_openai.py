@@ -0,0 +1,129 @@
+import argparse
+import json
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# local stand-in for the OpenAI chat completions endpoint, returns canned summaries
+#   python benchmarks/stub_openai.py --port 8090 --latency 0.5
+#   OPENAI_API_BASE=http://127.0.0.1:8090/v1 GPT_API_KEY=stub python summaries_batch.py
+# streamed requests get the summary word by word, --token-delay seconds apart
+
+CANNED_SUMMARY = (
+    'A versatile data and analytics consultant who designs reliable data platforms, '
+    'builds pipelines and reporting solutions, and works closely with stakeholders to turn '
+    'business questions into practical outcomes.\n\n'
+    'Known for a pragmatic approach, clear communication and a focus on delivering value early, '
+    'with experience across cloud platforms, modelling and visualisation.'
+)
+
+class StubState:
+
+    def __init__(self, latency=0.0, fail_every=0, token_delay=0.0):
+        self.latency = latency # seconds before the response
+        self.fail_every = fail_every # every n-th request gets a 500, 0 never
+        self.token_delay = token_delay # seconds between streamed chunks
+        self.requests = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+
+def make_handler(state: StubState):
+
+    class Handler(BaseHTTPRequestHandler):
+
+        def log_message(self, *args):
+            pass
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+            with state.lock:
+                state.requests += 1
+                n = state.requests
+                state.in_flight += 1
+                state.max_in_flight = max(state.max_in_flight, state.in_flight)
+            try:
+                time.sleep(state.latency)
+                if state.fail_every and n % state.fail_every == 0:
+                    self.send_json(500, {'error' : {'message' : 'stub failure', 'type' : 'server_error'}})
+                elif body.get('stream'):
+                    self.send_stream(body)
+                else:
+                    self.send_json(200, completion(body))
+            finally:
+                with state.lock:
+                    state.in_flight -= 1
+
+        def send_json(self, status: int, payload: dict):
+            data = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        # server-sent events, one chunk per word and a [DONE] marker
+        def send_stream(self, body: dict):
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/event-stream')
+            self.end_headers()
+            self.close_connection = True
+            try:
+                for chunk in completion_chunks(body):
+                    self.wfile.write(f'data: {json.dumps(chunk)}\n\n'.encode())
+                    self.wfile.flush()
+                    time.sleep(state.token_delay)
+                self.wfile.write(b'data: [DONE]\n\n')
+                self.wfile.flush()
+            except (BrokenPipeError, ConnectionResetError):
+                pass # the client stopped reading, a cancelled job
+
+    return Handler
+
+def completion(body: dict):
+    return {
+        'id' : 'chatcmpl-stub',
+        'object' : 'chat.completion',
+        'created' : int(time.time()),
+        'model' : body.get('model', 'stub'),
+        'choices' : [{
+            'index' : 0,
+            'message' : {'role' : 'assistant', 'content' : CANNED_SUMMARY},
+            'finish_reason' : 'stop'
+        }],
+        'usage' : {'prompt_tokens' : 0, 'completion_tokens' : 0, 'total_tokens' : 0}
+    }
+
+def completion_chunks(body: dict):
+    chunk = lambda delta, finish_reason=None : {
+        'id' : 'chatcmpl-stub',
+        'object' : 'chat.completion.chunk',
+        'created' : int(time.time()),
+        'model' : body.get('model', 'stub'),
+        'choices' : [{'index' : 0, 'delta' : delta, 'finish_reason' : finish_reason}]
+    }
+    yield chunk({'role' : 'assistant'})
+    for i, word in enumerate(CANNED_SUMMARY.split(' ')):
+        yield chunk({'content' : (' ' if i > 0 else '') + word})
+    yield chunk({}, 'stop')
+
+# start the stub in a background thread, returns the server and its state
+def serve(port=0, latency=0.0, fail_every=0, token_delay=0.0):
+    state = StubState(latency, fail_every, token_delay)
+    server = ThreadingHTTPServer(('127.0.0.1', port), make_handler(state))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, state
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Local stand-in for the OpenAI chat completions endpoint.')
+    parser.add_argument('--port', type=int, default=8090)
+    parser.add_argument('--latency', type=float, default=0.5, help='seconds per response')
+    parser.add_argument('--fail-every', type=int, default=0, help='answer every n-th request with a 500')
+    parser.add_argument('--token-delay', type=float, default=0.05, help='seconds between streamed chunks')
+    args = parser.parse_args()
+    server, state = serve(args.port, args.latency, args.fail_every, args.token_delay)
+    print(f'stub OpenAI endpoint on http://127.0.0.1:{server.server_port}/v1')
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
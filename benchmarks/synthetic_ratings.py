@@ -0,0 +1,99 @@
+import argparse
+import numpy as np
+import pandas as pd
+
+# synthetic "Ratings" sheets in the shape of the workbook, to measure how the app scales past its real size
+#   python benchmarks/synthetic_ratings.py --consultants 1000 --technologies 300 --streams 12 --output ratings.xlsx
+# the columns, header text, stream spelling and rating distribution follow the current workbook
+
+PURE_COUNT_HEADER = 'Pure count of the number of consultants with ratings of 4 or 5\nCoverage >= 4'
+IMPLEMENTABILITY_HEADER = (
+    'Implementability (applicable to exposé workpackages and Solution delivery categories only), '
+    'referring iterative and incremental with a fragmented timeline vs a consistent and predictable block of time'
+)
+
+STREAMS = [
+    'Data Engineer', 'Data Integrator', 'Data Scientist', 'Business Modeller', 'Visualisation Specialist',
+    'Technical Custodian', 'App Developer', 'Project Manager', 'Business Analyst', 'Architect',
+    'Data Modeller', 'Release Engineer', 'Data Custodian', 'Trainer', 'Product Team',
+]
+CATEGORIES = [
+    'Azure', 'exposé work packages', 'AWS', 'GCP', 'Solution delivery experience', 'Language',
+    'SQL On-prem', 'SAP', 'Power Platform', 'Databricks (Azure, AWS, GCP)', 'exposéAI', 'Methodology',
+]
+RELEVANCE = ['Red hot', 'Focus', 'Lesser focus', 'Innovation Stage', 'Sunset']
+RELEVANCE_WEIGHTS = [0.36, 0.35, 0.24, 0.03, 0.02]
+FIRST_NAMES = [
+    'Adam', 'Chris', 'Emma', 'Heidi', 'Jake', 'Jason', 'Priya', 'Rachel', 'Rory', 'Sandra',
+    'Stephen', 'Teresa', 'Vidhya', 'Will', 'Aman', 'Clay', 'Lynton', 'Nghia', 'Ralph', 'Reagan',
+]
+
+# share of the ratings 1 to 5 among the non-zero ratings of the workbook
+RATING_WEIGHTS = np.array([947, 997, 688, 551, 398]) / 3581
+MISSING_SHARE = 0.003 # blank cells
+
+# names of the n extra streams past the known ones
+stream_names = lambda n : STREAMS[:n] + [f'Persona Stream {i + 1}' for i in range(len(STREAMS), n)]
+
+def consultant_names(n: int):
+    names = [FIRST_NAMES[i % len(FIRST_NAMES)] for i in range(n)]
+    return [name if i < len(FIRST_NAMES) else f'{name} {i // len(FIRST_NAMES)}' for i, name in enumerate(names)]
+
+# the raw ratings sheet, as pd.read_excel returns it
+# consultants rate about 44% of technologies, broad consultants and popular technologies more often
+def synthetic_ratings(consultants: int, technologies: int, streams: int, seed=0):
+    random = np.random.default_rng(seed)
+    names = stream_names(streams)
+
+    # one to three streams per technology, written the way people type them into the sheet
+    tech_streams = []
+    for _ in range(technologies):
+        picked = random.choice(names, size=min(random.choice([1, 2, 3], p=[0.55, 0.35, 0.1]), streams), replace=False)
+        picked = [name.lower() if random.random() < 0.05 else name for name in picked]
+        tech_streams.append(random.choice([', ', ',', ' , ']).join(picked))
+
+    # breadth of each consultant times popularity of each technology
+    breadth = random.beta(2, 2.5, size=consultants)
+    popularity = random.beta(2, 2, size=technologies)
+    rated = random.random((technologies, consultants)) < np.clip(2 * popularity[:, None] * breadth[None, :], 0, 1)
+    level = random.choice([-1, 0, 1], p=[0.25, 0.5, 0.25], size=consultants)
+    ratings = np.clip(random.choice(np.arange(1, 6), p=RATING_WEIGHTS, size=(technologies, consultants)) + level, 1, 5)
+    ratings = np.where(rated, ratings, 0).astype('float64')
+    ratings[random.random((technologies, consultants)) < MISSING_SHARE] = np.nan
+
+    df = pd.concat([
+        pd.DataFrame({
+            'ID' : np.arange(1, technologies + 1),
+            'Technology' : [f'Technology {i + 1:05d}' for i in range(technologies)],
+            'Persona Stream' : tech_streams,
+            'Platform, Area or Categories' : random.choice(CATEGORIES, size=technologies),
+            'Relevance' : random.choice(RELEVANCE, p=RELEVANCE_WEIGHTS, size=technologies),
+        }),
+        pd.DataFrame(ratings, columns=consultant_names(consultants)),
+        pd.DataFrame({
+            PURE_COUNT_HEADER : (ratings >= 4).sum(axis=1),
+            IMPLEMENTABILITY_HEADER : np.nan,
+            f'Unnamed: {consultants + 7}' : np.nan,
+        }),
+    ], axis=1)
+    return df
+
+# a workbook with the synthetic sheet, read_skills_matrix only needs the Ratings sheet
+def write_workbook(df, path: str):
+    df.to_excel(path, sheet_name='Ratings', index=False)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Write a synthetic skills matrix workbook.')
+    parser.add_argument('--consultants', type=int, default=1000)
+    parser.add_argument('--technologies', type=int, default=160)
+    parser.add_argument('--streams', type=int, default=12)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', required=True, help='xlsx file to write')
+    args = parser.parse_args(argv)
+
+    df = synthetic_ratings(args.consultants, args.technologies, args.streams, args.seed)
+    write_workbook(df, args.output)
+    print(f'{args.output}: {args.technologies} technologies x {args.consultants} consultants, {args.streams} streams')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,40 @@
+import os
+import sys
+import diskcache
+import pytest
+
+# the app modules import each other by name, like in app/ and benchmarks/
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(ROOT, 'app'))
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+from helpers_data import df_renamer, df_dropper, df_persona_stream_cleaner
+from helpers_matrix import build_skills_matrix
+from synthetic_ratings import synthetic_ratings
+import stub_openai
+
+# small synthetic skills matrix
+@pytest.fixture
+def matrix():
+    clean = synthetic_ratings(6, 60, 4).pipe(df_renamer).pipe(df_dropper).pipe(df_persona_stream_cleaner)
+    matrix = build_skills_matrix(clean)
+    matrix.version = 'synthetic'
+    return matrix
+
+@pytest.fixture
+def cache(tmp_path):
+    with diskcache.Cache(str(tmp_path / 'cache')) as cache:
+        yield cache
+
+# openai pointed at the stub endpoint, streamed chunks are token_delay seconds apart
+@pytest.fixture
+def stub(monkeypatch):
+    import openai
+    import helpers_gpt
+    server, state = stub_openai.serve(token_delay=0.02)
+    monkeypatch.setattr(openai, 'api_base', f'http://127.0.0.1:{server.server_port}/v1')
+    monkeypatch.setattr(helpers_gpt, 'API_KEY', 'stub')
+    helpers_gpt.completion_client.cache_clear()
+    yield state
+    helpers_gpt.completion_client.cache_clear()
+    server.shutdown()
@@ -0,0 +1,46 @@
+import copy
+import json
+import pytest
+from flask import Flask
+from helpers_api import api_blueprint
+
+class AllowAll:
+
+    def is_authorized(self):
+        return True
+
+# a dataset reloaded right after a request read its matrix
+class ReloadingDataset:
+
+    def __init__(self, matrix):
+        self.current = matrix
+        self.reloaded = copy.copy(matrix)
+        self.reloaded.version = 'reloaded'
+
+    @property
+    def matrix(self):
+        matrix, self.current = self.current, self.reloaded
+        return matrix
+
+    @property
+    def version(self):
+        return self.current.version
+
+@pytest.fixture
+def client(matrix):
+    server = Flask(__name__)
+    server.register_blueprint(api_blueprint(ReloadingDataset(matrix), AllowAll()), url_prefix='/api/v1')
+    return server.test_client()
+
+def test_etag_and_payload_carry_the_version_answered_from(client, matrix):
+    technology = matrix.options('technology')[0]
+    response = client.get(f'/api/v1/consultants?technology={technology}')
+    assert response.status_code == 200
+    assert response.headers['ETag'] == 'W/"synthetic"'
+    assert json.loads(response.data)['version'] == 'synthetic'
+
+def test_conditional_get_only_for_valid_requests(client, matrix):
+    headers = {'If-None-Match' : 'W/"synthetic"'}
+    assert client.get('/api/v1/version', headers=headers).status_code == 304
+    assert client.get('/api/v1/consultants/nobody/skills', headers=headers).status_code == 404
+    assert client.get('/api/v1/consultants?min_rating=x', headers=headers).status_code == 400
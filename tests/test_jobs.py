@@ -0,0 +1,40 @@
+import pytest
+from helpers_jobs import JobQueue, JobFailed
+
+def run(payload):
+    if payload == 'fail to start':
+        raise RuntimeError('no generator')
+    return iter(payload)
+
+@pytest.fixture
+def jobs(cache):
+    jobs = JobQueue(cache, run, name='test_jobs', workers=1, poll=0.01)
+    jobs.start()
+    return jobs
+
+def test_result_is_the_last_value(jobs):
+    assert list(jobs.stream('abc', ['a', 'b', 'c']))[-1] == 'c'
+
+def test_empty_job_finishes_without_a_value(jobs):
+    assert list(jobs.stream('empty', [])) == []
+
+def test_job_failing_to_start_is_reported_and_the_worker_goes_on(jobs):
+    with pytest.raises(JobFailed, match='no generator'):
+        list(jobs.stream('broken', 'fail to start'))
+    assert jobs.stats()['running'] == 0
+    assert list(jobs.stream('after', ['x'])) == ['x']
+
+def test_retry_after_a_failure_runs_again(cache):
+    attempts = []
+    def flaky(payload):
+        attempts.append(payload)
+        if len(attempts) == 1:
+            raise RuntimeError('upstream down')
+        yield 'summary'
+
+    jobs = JobQueue(cache, flaky, name='flaky_jobs', workers=1, poll=0.01)
+    jobs.start()
+    with pytest.raises(JobFailed, match='upstream down'):
+        list(jobs.stream('key', 'payload'))
+    assert list(jobs.stream('key', 'payload')) == ['summary']
+    assert len(attempts) == 2
@@ -0,0 +1,49 @@
+from functools import partial
+from time import perf_counter
+from helpers_gpt import generate_prompt_from_data, run_summary_job, stream_profile_summary, summary_key, SharedTokenBucket
+from helpers_jobs import JobQueue
+from stub_openai import CANNED_SUMMARY
+
+MODEL = 'gpt-3.5-turbo'
+
+# what the profile summary callback does with every partial summary
+class Progress:
+
+    def __init__(self):
+        self.updates = []
+        self.start = perf_counter()
+
+    def __call__(self, text: str):
+        self.updates.append((perf_counter() - self.start, text))
+
+    def check_incremental(self):
+        texts = [text for _, text in self.updates]
+        assert len(texts) >= 3
+        assert all(later.startswith(earlier) and later != earlier for earlier, later in zip(texts, texts[1:]))
+        assert texts[-1] == CANNED_SUMMARY
+        # the first words are shown while the rest is still streaming
+        assert self.updates[-1][0] - self.updates[0][0] > 0.3
+
+def test_run_summary_job_streams_and_caches(matrix, cache, stub):
+    name = matrix.options('consultant_name')[0]
+    prompt = generate_prompt_from_data(matrix, name, 100)
+    set_progress = Progress()
+    for summary in run_summary_job((prompt, MODEL, name), cache, SharedTokenBucket(cache, 100)):
+        set_progress(summary)
+    set_progress.check_incremental()
+    assert cache.get(summary_key(prompt, MODEL)) == CANNED_SUMMARY
+    assert stub.requests == 1
+
+def test_stream_profile_summary_through_the_job_queue(matrix, cache, stub):
+    name = matrix.options('consultant_name')[0]
+    jobs = JobQueue(cache, partial(run_summary_job, cache=cache, limiter=SharedTokenBucket(cache, 100)), name='test_jobs', workers=1)
+    jobs.start()
+    set_progress = Progress()
+    for summary in stream_profile_summary(matrix, name, 100, MODEL, cache=cache, jobs=jobs):
+        set_progress(summary)
+    set_progress.check_incremental()
+    assert cache.get(summary_key(generate_prompt_from_data(matrix, name, 100), MODEL)) == CANNED_SUMMARY
+
+    # the cached summary is returned whole without another request
+    assert list(stream_profile_summary(matrix, name, 100, MODEL, cache=cache, jobs=jobs)) == [CANNED_SUMMARY]
+    assert stub.requests == 1
@@ -0,0 +1,38 @@
+from helpers_cache import open_caches
+from helpers_gpt import generate_prompt_from_data, summary_key
+from stub_openai import CANNED_SUMMARY
+from summaries_batch import run_batch, journal_key
+
+MODELS, WORDS = ['gpt-3.5-turbo'], [100, 200]
+
+def test_generates_missing_summaries_and_skips_cached(matrix, cache, stub):
+    names = matrix.options('consultant_name')[:3]
+    stats = run_batch(matrix, cache, MODELS, WORDS, consultants=names, concurrency=2, rate=100)
+    assert stats == {'jobs' : 6, 'skipped' : 0, 'generated' : 6, 'failed' : 0}
+    assert stub.requests == 6
+    for name in names:
+        for n_words in WORDS:
+            assert cache.get(summary_key(generate_prompt_from_data(matrix, name, n_words), MODELS[0])) == CANNED_SUMMARY
+
+    # a second run finds everything cached
+    stats = run_batch(matrix, cache, MODELS, WORDS, consultants=names, concurrency=2, rate=100)
+    assert stats == {'jobs' : 6, 'skipped' : 6, 'generated' : 0, 'failed' : 0}
+    assert stub.requests == 6
+
+def test_refresh_resumes_from_its_journal(matrix, cache, stub):
+    names = matrix.options('consultant_name')[:2]
+    journal = journal_key(matrix.version, MODELS, WORDS)
+    cache.set(journal, {(names[0], WORDS[0], MODELS[0]), (names[1], WORDS[1], MODELS[0])})
+
+    stats = run_batch(matrix, cache, MODELS, WORDS, consultants=names, concurrency=2, rate=100, refresh=True)
+    assert stats == {'jobs' : 4, 'skipped' : 2, 'generated' : 2, 'failed' : 0}
+    assert stub.requests == 2
+    assert journal not in cache
+
+def test_paced_by_the_bucket_the_app_shares(matrix, tmp_path, stub):
+    cache, results = open_caches(str(tmp_path / 'shared'))
+    name = matrix.options('consultant_name')[0]
+    run_batch(matrix, cache, MODELS, WORDS[:1], consultants=[name], rate=100, results=results)
+    assert cache.get('token_bucket:gpt') is not None
+    key = summary_key(generate_prompt_from_data(matrix, name, WORDS[0]), MODELS[0])
+    assert results.get(key) == CANNED_SUMMARY and key not in cache
@@ -0,0 +1,51 @@
+import random
+from functools import reduce
+from itertools import combinations
+from operator import or_
+from helpers_team import drop_dominated, greedy_cover, min_cover
+
+# size of the smallest cover by trying every combination
+def exhaustive_size(bitsets: list, target: int):
+    for size in range(len(bitsets) + 1):
+        if any(reduce(or_, team, 0) & target == target for team in combinations(bitsets, size)):
+            return size
+
+def test_drop_dominated_keeps_only_maximal_sets():
+    assert sorted(drop_dominated([0b0011, 0b0001, 0b0111, 0b0111, 0b1000])) == [0b0111, 0b1000]
+
+def test_min_cover_beats_the_greedy_cover():
+    bitsets = [0b001111, 0b010011, 0b101100]
+    assert len(greedy_cover(bitsets, 0b111111)) == 3
+    teams, optimal = min_cover(bitsets, 0b111111)
+    assert teams == [[0b010011, 0b101100]] or teams == [[0b101100, 0b010011]]
+    assert optimal
+
+def test_min_cover_leaves_out_bits_nobody_has():
+    teams, optimal = min_cover([0b0011, 0b0100], 0b1111)
+    assert [sorted(team) for team in teams] == [[0b0011, 0b0100]] and optimal
+    assert min_cover([], 0b11) == ([[]], True)
+
+def test_min_cover_matches_exhaustive_search():
+    rng = random.Random(0)
+    for _ in range(200):
+        n_bits = rng.randint(1, 10)
+        target = (1 << n_bits) - 1
+        bitsets = [rng.getrandbits(n_bits) for _ in range(rng.randint(1, 9))]
+        coverable = target & reduce(or_, bitsets, 0)
+        teams, optimal = min_cover(bitsets, target, time_budget=5, max_teams=3)
+        assert optimal
+        assert 1 <= len(teams) <= 3
+        for team in teams:
+            assert reduce(or_, team, 0) & target == coverable
+            assert len(team) == exhaustive_size(bitsets, coverable)
+
+def test_build_team_covers_the_technologies(matrix):
+    technologies = matrix.options('technology')[:6]
+    df, uncovered, optimal = matrix.build_team(technologies, 4, time_budget=5)
+    assert optimal
+    for _, team in df.groupby('team'):
+        covered = {name for names in team['technologies'] for name in names}
+        assert covered | set(uncovered) == set(technologies)
+    coverage = list(matrix.coverage_bits(technologies, 4).values())
+    target = (1 << len(technologies)) - 1
+    assert df.groupby('team').size().max() == exhaustive_size(coverage, target & reduce(or_, coverage, 0))
@@ -0,0 +1,59 @@
+from helpers_typeahead import TypeaheadIndex, dropdown_options, normalize
+
+TECHNOLOGIES = [
+    '.NET Core',
+    'Azure Machine Learning Studio',
+    'Azure SQLDB',
+    'Databricks SQL Warehouse',
+    'Exposé Accelerators',
+    'Networks (Express Route/ VPN)',
+    'Python',
+    'SQL Server Performance Tuning',
+    'Tableau',
+]
+
+def test_normalize_ignores_case_and_accents():
+    assert normalize('  Exposé ') == 'expose'
+
+def test_empty_query_returns_the_first_options():
+    index = TypeaheadIndex(TECHNOLOGIES)
+    assert index.search('', limit=3) == TECHNOLOGIES[:3]
+    assert index.search(' . ', limit=3) == TECHNOLOGIES[:3]
+
+def test_whole_prefix_ranks_before_word_prefix():
+    index = TypeaheadIndex(TECHNOLOGIES)
+    assert index.search('sql') == ['SQL Server Performance Tuning', 'Azure SQLDB', 'Databricks SQL Warehouse']
+    assert index.search('net') == ['Networks (Express Route/ VPN)', '.NET Core']
+
+def test_every_query_word_must_start_a_word():
+    index = TypeaheadIndex(TECHNOLOGIES)
+    # the other azure option only shares trigrams with the query, it comes after
+    assert index.search('azure mach') == ['Azure Machine Learning Studio', 'Azure SQLDB']
+    assert index.search('expose acc') == ['Exposé Accelerators']
+
+def test_substring_then_fuzzy_matches_fill_in():
+    index = TypeaheadIndex(TECHNOLOGIES)
+    assert index.search('ricks') == ['Databricks SQL Warehouse']
+    assert index.search('pyhton') == ['Python']
+    assert index.search('tablaeu') == ['Tableau']
+    assert index.search('zzzz') == []
+
+def test_short_queries_only_match_by_prefix():
+    index = TypeaheadIndex(TECHNOLOGIES)
+    assert index.search('th') == []
+
+def test_limit_applies_to_the_ranked_matches():
+    index = TypeaheadIndex(TECHNOLOGIES)
+    assert index.search('a', limit=2) == ['Azure SQLDB', 'Azure Machine Learning Studio']
+
+def test_dropdown_options_keep_the_selection_and_the_query():
+    options = dropdown_options(['Python', 'Tableau'], selected=['Tableau', 'Azure SQLDB'], query='pyhton')
+    assert [option['value'] for option in options] == ['Tableau', 'Azure SQLDB', 'Python']
+    assert options[2]['search'] == 'Python pyhton' and 'search' not in options[0]
+    assert dropdown_options(['Python'], selected='Python') == [{'label' : 'Python', 'value' : 'Python'}]
+
+def test_consultant_names_from_the_matrix(matrix):
+    names = matrix.options('consultant_name')
+    index = TypeaheadIndex(names)
+    assert index.search(names[3])[0] == names[3]
+    assert index.search(names[3][:-1].lower())[0] == names[3]